@@ -1,52 +1,135 @@
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from sentence_transformers import SentenceTransformer
 
 class GaussianModel:
     def __init__(self, transformer=None, model_name="all-MiniLM-L6-v2"):
         self.transformer = transformer if transformer is not None else SentenceTransformer(model_name)
         self.class_models = {}
-        self.shared_covariance = np.eye(2)  # Initialize with 2D identity matrix
+        self.shared_covariance = None  # Pooled within-class covariance
         self.epsilon = 1e-6  # Small constant for numerical stability
+        # Running sums the pooled covariance is derived from: sum of x x^T over
+        # all tag embeddings, sum of n * mean mean^T over classes, and total n
+        self._sum_xx = None
+        self._sum_mean_outer = None
+        self._total_count = 0
+        # Derived from class_models/shared_covariance; rebuilt lazily after add_class.
+        # With shared_covariance = L L^T, the whitening matrix is L^-1 and the
+        # Mahalanobis distance is the Euclidean distance after whitening.
+        self._whitening = None
+        self._class_names = []
+        self._whitened_means = None
+        # Set when shared_covariance is numerically the identity, in which case
+        # Mahalanobis distance is plain Euclidean distance and whitening is skipped
+        self._identity_covariance = False
 
     def add_class(self, class_name: str, tag_embeddings: np.ndarray) -> None:
         """Add a new class to the model with its tag embeddings."""
-        mean_vector = np.mean(tag_embeddings, axis=0)
-        if self.shared_covariance is None:
-            self.shared_covariance = np.cov(tag_embeddings.T)
-        else:
-            new_covariance = np.cov(tag_embeddings.T)
-            n_previous_classes = len(self.class_models)
-            self.shared_covariance = (
-                (n_previous_classes * self.shared_covariance + new_covariance) / (n_previous_classes + 1)
-            )
-        
+        embeddings = np.asarray(tag_embeddings, dtype=np.float64)
+        count = len(embeddings)
+        class_sum = embeddings.sum(axis=0)
+        class_sum_xx = embeddings.T @ embeddings
+        mean_vector = class_sum / count
+
+        if self._sum_xx is None:
+            dim = embeddings.shape[1]
+            self._sum_xx = np.zeros((dim, dim))
+            self._sum_mean_outer = np.zeros((dim, dim))
+        previous = self.class_models.get(class_name)
+        if previous is not None:
+            # Re-adding a class replaces it, so take its old statistics back out
+            self._sum_xx -= previous["sum_xx"]
+            self._sum_mean_outer -= np.outer(previous["sum"], previous["sum"]) / previous["count"]
+            self._total_count -= previous["count"]
+        self._sum_xx += class_sum_xx
+        self._sum_mean_outer += np.outer(class_sum, class_sum) / count
+        self._total_count += count
+
+        # Pooled within-class covariance:
+        # (sum x x^T - sum n mean mean^T) / (N - number of classes)
+        n_classes = len(self.class_models) + (class_name not in self.class_models)
+        dof = max(self._total_count - n_classes, 1)
+        self.shared_covariance = (self._sum_xx - self._sum_mean_outer) / dof
+
         # Add small regularization term to ensure matrix is invertible
-        self.shared_covariance += np.eye(self.shared_covariance.shape[0]) * self.epsilon
-        
+        dim = self.shared_covariance.shape[0]
+        self.shared_covariance += np.eye(dim) * self.epsilon
+        self._identity_covariance = bool(
+            np.linalg.norm(self.shared_covariance - np.eye(dim)) / dim < 1e-3
+        )
+
+        # Only the mean enters scoring; the class's sufficient statistics are
+        # kept so that replacing it can remove them from the running sums,
+        # while the raw embeddings are not
         self.class_models[class_name] = {
-            "mean_vector": mean_vector,
-            "tag_embeddings": tag_embeddings
+            "mean_vector": mean_vector.astype(np.float32),
+            "count": count,
+            "sum": class_sum,
+            "sum_xx": class_sum_xx
         }
+        self._whitening = None
+        self._whitened_means = None
+
+    def _ensure_whitening(self) -> Optional[np.ndarray]:
+        """Return the whitening matrix, factoring shared_covariance if stale.
+
+        Returns None when shared_covariance is the identity.
+        """
+        if self._identity_covariance:
+            return None
+        if self._whitening is None:
+            lower = np.linalg.cholesky(self.shared_covariance)
+            self._whitening = np.linalg.solve(lower, np.eye(lower.shape[0]))
+        return self._whitening
+
+    def _ensure_cache(self) -> None:
+        """Rebuild the whitening matrix and whitened class means if stale."""
+        whitening = self._ensure_whitening()
+        if self._whitened_means is None:
+            self._class_names = list(self.class_models)
+            means = np.stack([
+                model["mean_vector"] for model in self.class_models.values()
+            ])
+            self._whitened_means = means if whitening is None else means @ whitening.T
 
     def mahalanobis_distance(self, query_embedding: np.ndarray, mean_vector: np.ndarray) -> float:
         """Calculate the Mahalanobis distance between a query embedding and a class mean vector."""
-        inv_covariance = np.linalg.inv(self.shared_covariance)
-        diff = query_embedding - mean_vector
-        return np.sqrt(diff.T @ inv_covariance @ diff)
+        whitened = query_embedding - mean_vector
+        whitening = self._ensure_whitening()
+        if whitening is not None:
+            whitened = whitening @ whitened
+        return np.sqrt(whitened @ whitened)
 
     def select_top_k_classes(self, query_tags: List[str], k: int = 3) -> List[str]:
         """Select top k classes based on average Mahalanobis distance to query tags."""
         if not query_tags:
             raise ValueError("Query tags cannot be empty")
-            
-        query_embeddings = self.transformer.encode(query_tags)
-        distances = {}
-        for class_name, model in self.class_models.items():
-            avg_distance = np.mean([
-                self.mahalanobis_distance(embedding, model["mean_vector"])
-                for embedding in query_embeddings
-            ])
-            distances[class_name] = avg_distance
-        sorted_classes = sorted(distances.items(), key=lambda x: x[1])
-        return [cls for cls, _ in sorted_classes[:k]]
+
+        if not self.class_models:
+            return []
+        self._ensure_cache()
+
+        query_embeddings = np.asarray(self.transformer.encode(query_tags))
+        if self._identity_covariance:
+            # Identity covariance: plain Euclidean distances, expanded as
+            # |q|^2 + |m|^2 - 2 q.m so the only heavy work is one GEMM
+            means = self._whitened_means
+            squared = (
+                np.einsum('qd,qd->q', query_embeddings, query_embeddings)[:, None]
+                + np.einsum('cd,cd->c', means, means)[None, :]
+                - 2.0 * (query_embeddings @ means.T)
+            )
+            np.maximum(squared, 0.0, out=squared)
+        else:
+            # Squared distances of every query embedding to every class mean at
+            # once, as Euclidean distances in the whitened space
+            diff = (query_embeddings @ self._whitening.T)[:, None, :] - self._whitened_means[None, :, :]
+            squared = np.einsum('qcd,qcd->qc', diff, diff)
+        avg_distances = np.sqrt(squared).mean(axis=0)
+        # Only the k nearest classes need ordering
+        if k < len(avg_distances):
+            order = np.argpartition(avg_distances, k)[:k]
+            order = order[np.argsort(avg_distances[order], kind="stable")]
+        else:
+            order = np.argsort(avg_distances, kind="stable")
+        return [self._class_names[i] for i in order]
@@ -1,5 +1,4 @@
 from langchain_core.prompts import PromptTemplate
-from langchain_core.runnables import RunnableSequence
 
 class TagGenerator:
     def __init__(self, llm):
@@ -20,12 +19,17 @@ class TagGenerator:
                 "Tags:\n"
             )
         )
+        # The template is static apart from the query, so render it once around
+        # a marker and build each prompt by concatenation instead of template
+        # formatting. Rendering applies the template's own escaping
+        marker = "\x00user_query\x00"
+        rendered = self.prompt_template.format(user_query=marker)
+        if rendered.count(marker) != 1:
+            raise ValueError("Tag prompt template must use {user_query} exactly once")
+        self._prompt_prefix, _, self._prompt_suffix = rendered.partition(marker)
 
     def generate_tags(self, user_query):
-        chain = RunnableSequence(
-            first=self.prompt_template,
-            last=self.llm
-        )
-        response = chain.invoke({"user_query": user_query})
+        prompt = self._prompt_prefix + user_query + self._prompt_suffix
+        response = self.llm.invoke(prompt)
         tags = [tag.strip() for tag in response.split(',') if tag.strip()]
         return tags
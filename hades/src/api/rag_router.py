@@ -1,16 +1,19 @@
 """RAG API endpoints."""
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+import codecs
+from fastapi import APIRouter, HTTPException, Depends, Request, UploadFile, File
 from typing import Dict, List, Optional
 from pydantic import BaseModel
 from loguru import logger
 
-from db.arango import ArangoDB
 from rag.processor import DocumentProcessor
 from rag.retriever import Retriever
 from rag.chain import RAGChain
 
 router = APIRouter()
 
+# Uploads are read and decoded in chunks of this size
+_UPLOAD_CHUNK_SIZE = 64 * 1024
+
 class QueryRequest(BaseModel):
     query: str
     metadata_filter: Optional[Dict] = None
@@ -21,14 +24,15 @@ class QueryResponse(BaseModel):
     sources: Optional[List[str]] = None
     relevance_scores: Optional[List[float]] = None
 
-async def get_rag_chain():
-    """Get RAG chain instance."""
+async def get_rag_chain(request: Request) -> RAGChain:
+    """Get the shared RAG chain instance, building it on first use."""
+    chain = getattr(request.app.state, "rag_chain", None)
+    if chain is not None:
+        return chain
     try:
-        db = ArangoDB()
-        await db.connect()
-        
-        retriever = Retriever(db)
+        retriever = Retriever(request.app.state.db)
         chain = RAGChain(retriever)
+        request.app.state.rag_chain = chain
         return chain
     except Exception as e:
         logger.error(f"Failed to initialize RAG chain: {str(e)}")
@@ -37,12 +41,15 @@ async def get_rag_chain():
             detail="Failed to initialize RAG system"
         )
 
-async def get_document_processor():
-    """Get document processor instance."""
+async def get_document_processor(request: Request) -> DocumentProcessor:
+    """Get the shared document processor instance, building it on first use."""
+    processor = getattr(request.app.state, "document_processor", None)
+    if processor is not None:
+        return processor
     try:
-        db = ArangoDB()
-        await db.connect()
-        return DocumentProcessor(db)
+        processor = DocumentProcessor(request.app.state.db)
+        request.app.state.document_processor = processor
+        return processor
     except Exception as e:
         logger.error(f"Failed to initialize document processor: {str(e)}")
         raise HTTPException(
@@ -63,9 +70,11 @@ async def query(
             return_sources=request.return_sources
         )
         
+        # FastAPI validates the result against QueryResponse when serializing
+        # it, so return plain data rather than building the model twice
         if isinstance(response, dict):
-            return QueryResponse(**response)
-        return QueryResponse(response=response)
+            return response
+        return {"response": response}
         
     except Exception as e:
         logger.error(f"Query failed: {str(e)}")
@@ -82,8 +91,13 @@ async def ingest_document(
 ):
     """Ingest a document into the RAG system."""
     try:
-        content = await file.read()
-        text = content.decode("utf-8")
+        # Decode incrementally so the raw bytes are never held alongside the text
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        parts = []
+        while chunk := await file.read(_UPLOAD_CHUNK_SIZE):
+            parts.append(decoder.decode(chunk))
+        parts.append(decoder.decode(b"", final=True))
+        text = "".join(parts)
         
         # Process document
         doc_id = await processor.process(
@@ -1,9 +1,8 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from typing import Any, Dict
 from pydantic import BaseModel
 
 from memory_management.manager import MemoryManager
-from db.arango import ArangoDB
 from .rag_router import router as rag_router
 
 router = APIRouter()
@@ -24,10 +23,13 @@ class Response(BaseModel):
     success: bool
     data: Dict[str, Any] = {}
 
-async def get_memory_manager():
-    db = ArangoDB()
-    await db.connect()
-    return MemoryManager(db)
+def get_memory_manager(request: Request) -> MemoryManager:
+    """Get the memory manager created at startup.
+    
+    The tiers hold their data in process memory, so every request must see the
+    same manager.
+    """
+    return request.app.state.memory_manager
 
 @router.post("/store", response_model=Response)
 async def store_data(
@@ -1,11 +1,17 @@
-from pydantic import BaseSettings
+from functools import lru_cache
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional
 from pathlib import Path
 
 class Settings(BaseSettings):
+    model_config = SettingsConfigDict(case_sensitive=True, env_file=".env")
+    
     # API Settings
     API_V1_STR: str = "/api/v1"
     PROJECT_NAME: str = "HADES"
+    API_RELOAD: bool = False  # Auto-reload on code changes (development only)
+    # Memory tiers live in process memory, so extra workers do not share them
+    API_WORKERS: int = 1
     
     # Database Settings
     ARANGO_HOST: str = "localhost"
@@ -35,14 +41,21 @@ class Settings(BaseSettings):
     EMBEDDING_MODEL_NAME: str = "sentence-transformers/all-mpnet-base-v2"
     EMBEDDING_POOLING: str = "mean"
     EMBEDDING_CACHE_SIZE: int = 1024
+    EMBEDDING_CACHE_INT8: bool = False  # Store cached embeddings as int8 plus a scale
+    EMBEDDING_COMPILE: bool = False  # torch.compile the encoder when running on CUDA
     
     # HuggingFace Settings
     HF_TOKEN: Optional[str] = None
     HF_MODEL_CACHE_DIR: Path = Path("cache/models")
     HF_CONFIG_CACHE_DIR: Path = Path("cache/configs")
     
-    class Config:
-        case_sensitive = True
-        env_file = ".env"
+    # Monitoring Settings
+    GPU_POLL_INTERVAL_SECONDS: float = 5.0  # How often GPU metrics are sampled
+    PROMETHEUS_FINE_GRAINED_LATENCY_BUCKETS: bool = False  # Sub-300ms RAG query buckets
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings, parsing the environment only once."""
+    return Settings()
 
-settings = Settings()
+settings = get_settings()
@@ -1,11 +1,18 @@
 """Context analysis module for memory management."""
 
-from .models import ContextMetadata, AnalysisResult
+from .models import (
+    ContextMetadata,
+    AnalysisResult,
+    ContextMetadataModel,
+    AnalysisResultModel
+)
 from .analyzer import analyze_context, determine_allocation
 
 __all__ = [
     'ContextMetadata',
     'AnalysisResult',
+    'ContextMetadataModel',
+    'AnalysisResultModel',
     'analyze_context',
     'determine_allocation'
 ]
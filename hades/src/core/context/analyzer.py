@@ -1,5 +1,6 @@
 """Context analyzer for memory allocation decisions."""
 
+import sys
 import time
 from typing import Dict, Any, List
 from loguru import logger
@@ -13,7 +14,11 @@ ANALYSIS_TIME = Summary('context_analysis_seconds', 'Time spent analyzing contex
 TOKENIZATION_TIME = Summary('context_tokenization_seconds', 'Time spent tokenizing context')
 SEMANTIC_EXTRACTION_TIME = Summary('semantic_extraction_seconds', 'Time spent extracting semantics')
 
-async def tokenize_context(context: str) -> List[str]:
+# Allocation thresholds, bound once so determine_allocation skips the settings lookups
+_TARTARUS_RELEVANCE_THRESHOLD = settings.TARTARUS_RELEVANCE_THRESHOLD
+_LETHE_PROMOTION_THRESHOLD = settings.LETHE_PROMOTION_THRESHOLD
+
+def tokenize_context(context: str) -> List[str]:
     """
     Tokenize context string into meaningful units.
     
@@ -27,12 +32,14 @@ async def tokenize_context(context: str) -> List[str]:
         with TOKENIZATION_TIME.time():
             # Simple whitespace tokenization for now
             # TODO: Implement more sophisticated tokenization
-            return context.split()
+            # Interned so repeated tokens share one object and set() compares
+            # them by identity
+            return list(map(sys.intern, context.split()))
     except Exception as e:
         logger.error(f"Tokenization failed: {str(e)}")
         return []
 
-async def extract_semantics(context: str, tokens: List[str]) -> Dict[str, float]:
+def extract_semantics(context: str, tokens: List[str]) -> Dict[str, float]:
     """
     Extract semantic information from context.
     
@@ -47,16 +54,18 @@ async def extract_semantics(context: str, tokens: List[str]) -> Dict[str, float]
         with SEMANTIC_EXTRACTION_TIME.time():
             # Simple semantic extraction for now
             # TODO: Implement proper semantic analysis
+            token_count = len(tokens)
+            unique_count = len(set(tokens)) if token_count else 0
             return {
-                "relevance": 1.0 if len(tokens) > 10 else 0.5,
-                "complexity": len(set(tokens)) / len(tokens) if tokens else 0.0,
+                "relevance": 1.0 if token_count > 10 else 0.5,
+                "complexity": unique_count / token_count if token_count else 0.0,
                 "recency": time.time()
             }
     except Exception as e:
         logger.error(f"Semantic extraction failed: {str(e)}")
         return {}
 
-async def identify_relationships(
+def identify_relationships(
     context: str,
     tokens: List[str]
 ) -> Dict[str, List[str]]:
@@ -104,9 +113,9 @@ async def analyze_context(context: str) -> AnalysisResult:
                 )
             
             # Extract features
-            tokens = await tokenize_context(context)
-            semantics = await extract_semantics(context, tokens)
-            relationships = await identify_relationships(context, tokens)
+            tokens = tokenize_context(context)
+            semantics = extract_semantics(context, tokens)
+            relationships = identify_relationships(context, tokens)
             
             # Create metadata
             metadata = ContextMetadata(
@@ -146,7 +155,7 @@ def determine_allocation(metadata: ContextMetadata) -> AnalysisResult:
         complexity = metadata.semantics.get("complexity", 0.0)
         
         # Determine tier and priority
-        if relevance > settings.TARTARUS_RELEVANCE_THRESHOLD:
+        if relevance > _TARTARUS_RELEVANCE_THRESHOLD:
             if complexity > 0.7 or metadata.access_count > 5:
                 return AnalysisResult(
                     metadata=metadata,
@@ -161,7 +170,7 @@ def determine_allocation(metadata: ContextMetadata) -> AnalysisResult:
                 ttl=3600  # 1 hour
             )
         
-        if relevance > settings.LETHE_PROMOTION_THRESHOLD:
+        if relevance > _LETHE_PROMOTION_THRESHOLD:
             return AnalysisResult(
                 metadata=metadata,
                 suggested_tier="tartarus",
@@ -1,26 +1,56 @@
 """Models for context analysis and memory allocation."""
 
+from dataclasses import asdict, dataclass, field
 from typing import Dict, List, Literal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
-class ContextMetadata(BaseModel):
+# Plain slotted dataclasses rather than Pydantic models: both are built from
+# already-trusted values on every analyze_context call, where validation would
+# only add per-request cost. The Pydantic models below are for API boundaries,
+# reached through to_pydantic().
+
+@dataclass(frozen=True, slots=True)
+class ContextMetadata:
     """Metadata for context analysis."""
+    tokens: List[str] = field(default_factory=list)
+    semantics: Dict[str, float] = field(default_factory=dict)
+    relationships: Dict[str, List[str]] = field(default_factory=dict)
+    last_access: float = 0.0
+    access_count: int = 0
+    relevance_score: float = 0.0
+
+    def to_pydantic(self) -> "ContextMetadataModel":
+        """Validated copy for returning from the API."""
+        return ContextMetadataModel(**asdict(self))
+
+@dataclass(frozen=True, slots=True)
+class AnalysisResult:
+    """Result of context analysis."""
+    metadata: ContextMetadata
+    suggested_tier: Literal["elysium", "asphodel", "tartarus", "lethe"]
+    priority: Literal["high", "medium", "low"] = "medium"
+    ttl: int = 3600  # Time-to-live in seconds
+
+    def to_pydantic(self) -> "AnalysisResultModel":
+        """Validated copy for returning from the API."""
+        return AnalysisResultModel(**asdict(self))
+
+class ContextMetadataModel(BaseModel):
+    """Metadata for context analysis, validated at API boundaries."""
+    model_config = ConfigDict(frozen=True)
+
     tokens: List[str] = Field(default_factory=list)
     semantics: Dict[str, float] = Field(default_factory=dict)
     relationships: Dict[str, List[str]] = Field(default_factory=dict)
     last_access: float = 0.0
     access_count: int = 0
     relevance_score: float = 0.0
-    
-    class Config:
-        frozen = True  # Immutable to prevent accidental modifications
 
-class AnalysisResult(BaseModel):
-    """Result of context analysis."""
-    metadata: ContextMetadata
+class AnalysisResultModel(BaseModel):
+    """Result of context analysis, validated at API boundaries."""
+    model_config = ConfigDict(frozen=True)
+
+    metadata: ContextMetadataModel
     suggested_tier: Literal["elysium", "asphodel", "tartarus", "lethe"]
     priority: Literal["high", "medium", "low"] = "medium"
     ttl: int = 3600  # Time-to-live in seconds
-    
-    class Config:
-        frozen = True
@@ -7,22 +7,27 @@
 #    - Implement cache invalidation strategy
 #    - Add cache stats monitoring
 #
-# 2. Implement batch embedding generation:
-#    - Add batch processing methods
-#    - Implement dynamic batching based on input lengths
+# 2. Extend batch embedding generation:
 #    - Add queue system for batch collection
 #    - Optimize batch size based on available GPU memory
 #    - Add batch processing metrics
 
+import hashlib
+from collections import OrderedDict
+import numpy as np
 import torch
-from typing import List, Optional
+from typing import Any, List, Optional
 from loguru import logger
 from prometheus_client import Summary, Counter
 from transformers import AutoTokenizer, AutoModel
-from functools import lru_cache
 
 from core.config import settings
 
+try:
+    import intel_extension_for_pytorch as ipex
+except ImportError:  # Optional; only used for CPU inference
+    ipex = None
+
 # Metrics
 EMBEDDING_TIME = Summary('embedding_generation_seconds', 'Time spent generating embeddings')
 EMBEDDING_OPS = Counter('embedding_operations_total', 'Total embedding operations')
@@ -38,6 +43,20 @@ class EmbeddingModel:
         self.tokenizer = None
         self.model = None
         self._initialized = False
+        # Reduced precision the forward pass autocasts to: on CUDA always, on
+        # CPU only once the model has been optimized with IPEX
+        self._autocast_dtype = (
+            torch.float16
+            if self.device.type == 'cuda' and not torch.cuda.is_bf16_supported()
+            else torch.bfloat16
+        )
+        self._autocast = self.device.type == 'cuda'
+        # LRU of normalized embeddings keyed by a digest of (pooling, text), so
+        # the cache holds neither the texts nor lists of Python floats. With
+        # EMBEDDING_CACHE_INT8 entries are (int8 array, scale) pairs instead.
+        self._cache: OrderedDict[bytes, Any] = OrderedDict()
+        self._cache_size = settings.EMBEDDING_CACHE_SIZE
+        self._cache_int8 = settings.EMBEDDING_CACHE_INT8
         
     async def initialize(self) -> bool:
         """Initialize the model and tokenizer."""
@@ -52,15 +71,29 @@ class EmbeddingModel:
                 use_auth_token=settings.HF_TOKEN
             )
             
+            # On CUDA the weights are loaded directly in the autocast dtype,
+            # halving load bandwidth and device memory
             self.model = AutoModel.from_pretrained(
                 self.model_name,
                 cache_dir=settings.HF_MODEL_CACHE_DIR,
-                use_auth_token=settings.HF_TOKEN
+                use_auth_token=settings.HF_TOKEN,
+                torch_dtype=self._autocast_dtype if self.device.type == 'cuda' else None
             ).to(self.device)
             
             # Set to evaluation mode
             self.model.eval()
             
+            if settings.EMBEDDING_COMPILE and self.device.type == 'cuda':
+                self.model = torch.compile(
+                    self.model,
+                    mode='reduce-overhead',
+                    fullgraph=False
+                )
+            elif self.device.type == 'cpu' and ipex is not None:
+                # oneDNN bf16 kernels (AVX-512 BF16 / AMX on recent Xeons)
+                self.model = ipex.optimize(self.model, dtype=torch.bfloat16)
+                self._autocast = True
+            
             self._initialized = True
             logger.info(f"Embedding model {self.model_name} initialized successfully")
             return True
@@ -70,12 +103,11 @@ class EmbeddingModel:
             EMBEDDING_ERRORS.inc()
             return False
             
-    @torch.no_grad()
     async def generate(
         self,
         text: str,
         pooling: str = 'mean'
-    ) -> Optional[List[float]]:
+    ) -> Optional[np.ndarray]:
         """
         Generate embeddings for input text.
         
@@ -84,55 +116,153 @@ class EmbeddingModel:
             pooling: Pooling strategy ('mean' or 'cls')
             
         Returns:
-            List of floats representing the embedding vector
+            float32 array holding the embedding vector
+        """
+        # A batch of one: the cache lookup, lazy initialization and forward
+        # pass all live in generate_batch
+        embeddings = await self.generate_batch([text], pooling=pooling)
+        return None if embeddings is None else embeddings[0]
+            
+    async def generate_batch(
+        self,
+        texts: List[str],
+        batch_size: int = 32,
+        pooling: str = 'mean'
+    ) -> Optional[np.ndarray]:
+        """
+        Generate embeddings for several texts, batch_size texts per forward pass.
+        
+        Args:
+            texts: Input texts to embed
+            batch_size: Number of texts per forward pass
+            pooling: Pooling strategy ('mean' or 'cls')
+            
+        Returns:
+            float32 array of shape (len(texts), dim), one row per text
         """
         try:
+            # Only texts missing from the cache go through the model
+            keys = [_cache_key(text, pooling) for text in texts]
+            cached = [self._cache_get(key) for key in keys]
+            missing = [i for i, embedding in enumerate(cached) if embedding is None]
+            if texts and not missing:
+                return np.stack(cached)
+                
             with EMBEDDING_TIME.time():
                 # Ensure model is initialized
                 if not self._initialized:
                     if not await self.initialize():
                         return None
                 
-                # Tokenize text
-                inputs = self.tokenizer(
-                    text,
-                    padding=True,
+                embeddings = np.empty(
+                    (len(texts), self.model.config.hidden_size),
+                    dtype=np.float32
+                )
+                if not texts:
+                    return embeddings
+                for i, embedding in enumerate(cached):
+                    if embedding is not None:
+                        embeddings[i] = embedding
+                    
+                # Tokenize once without padding, then batch texts of similar
+                # length together so each batch pads only to its own longest
+                encoded = self.tokenizer(
+                    [texts[i] for i in missing],
+                    padding=False,
                     truncation=True,
-                    max_length=512,
-                    return_tensors='pt'
-                ).to(self.device)
-                
-                # Generate embeddings
-                outputs = self.model(**inputs)
-                
-                # Pool embeddings
-                if pooling == 'cls':
-                    embeddings = outputs.last_hidden_state[:, 0]
-                else:  # mean pooling
-                    attention_mask = inputs['attention_mask']
-                    embeddings = mean_pooling(
-                        outputs.last_hidden_state,
-                        attention_mask
-                    )
+                    max_length=512
+                )
+                lengths = np.fromiter(
+                    (len(ids) for ids in encoded['input_ids']),
+                    dtype=np.int64,
+                    count=len(missing)
+                )
+                order = np.argsort(lengths, kind="stable")
+                missing = np.asarray(missing)
                 
-                # Normalize embeddings
-                embeddings = torch.nn.functional.normalize(embeddings, p=2, dim=1)
-                
-                # Convert to list and return
-                embedding_list = embeddings[0].cpu().tolist()
-                
-                EMBEDDING_OPS.inc()
-                return embedding_list
+                # Results stay on the device until every batch is done, then
+                # come back to the host in a single copy
+                computed = []
+                for start in range(0, len(order), batch_size):
+                    batch = order[start:start + batch_size]
+                    inputs = self.tokenizer.pad(
+                        [{key: values[i] for key, values in encoded.items()} for i in batch],
+                        return_tensors='pt'
+                    ).to(self.device)
+                    computed.append(self._embed(inputs, pooling))
+                # Scatter back to the callers' order
+                embeddings[missing[order]] = torch.cat(computed).cpu().numpy()
+                    
+                # Rows are copied so cached entries don't pin the whole batch
+                for i in missing:
+                    self._cache_put(keys[i], embeddings[i].copy())
+                    
+                EMBEDDING_OPS.inc(len(missing))
+                return embeddings
                 
         except Exception as e:
-            logger.error(f"Failed to generate embedding: {str(e)}")
+            logger.error(f"Failed to generate batch embeddings: {str(e)}")
             EMBEDDING_ERRORS.inc()
             return None
             
-    @lru_cache(maxsize=1024)
-    def get_cached_embedding(self, text: str) -> Optional[List[float]]:
+    def _embed(self, inputs: Any, pooling: str) -> torch.Tensor:
+        """Run the model on tokenized inputs; one normalized float32 row per input."""
+        # On CUDA the forward runs in bf16 (fp16 where bf16 is unsupported);
+        # on CPU in bf16 when IPEX is in use
+        with torch.inference_mode(), torch.autocast(
+            self.device.type,
+            dtype=self._autocast_dtype,
+            enabled=self._autocast
+        ):
+            outputs = self.model(**inputs)
+            
+            # Pool embeddings
+            if pooling == 'cls':
+                embeddings = outputs.last_hidden_state[:, 0]
+            else:  # mean pooling
+                embeddings = mean_pooling(
+                    outputs.last_hidden_state,
+                    inputs['attention_mask']
+                )
+            
+            # Normalize embeddings in full precision
+            embeddings = torch.nn.functional.normalize(embeddings.float(), p=2, dim=1)
+        return embeddings
+            
+    def get_cached_embedding(self, text: str, pooling: str = 'mean') -> Optional[np.ndarray]:
         """Get cached embedding for text if available."""
-        return None  # Placeholder for actual cache implementation
+        return self._cache_get(_cache_key(text, pooling))
+    
+    def _cache_get(self, key: bytes) -> Optional[np.ndarray]:
+        """Look up an embedding in the cache, marking it recently used."""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        self._cache.move_to_end(key)
+        if self._cache_int8:
+            quantized, scale = entry
+            return quantized.astype(np.float32) * scale
+        return entry
+    
+    def _cache_put(self, key: bytes, embedding: np.ndarray) -> None:
+        """Add an embedding to the cache, evicting the least recently used."""
+        if self._cache_int8:
+            # Symmetric per-vector quantization: 4x smaller than float32
+            peak = float(np.abs(embedding).max())
+            scale = np.float32(peak / 127.0 if peak > 0 else 1.0)
+            self._cache[key] = (np.round(embedding / scale).astype(np.int8), scale)
+        else:
+            self._cache[key] = embedding
+        self._cache.move_to_end(key)
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+def _cache_key(text: str, pooling: str) -> bytes:
+    """Digest identifying an embedding in the cache."""
+    return hashlib.blake2b(
+        f"{pooling}\0{text}".encode(),
+        digest_size=16
+    ).digest()
 
 def mean_pooling(token_embeddings: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
     """
@@ -2,12 +2,45 @@ import sys
 from loguru import logger
 from pathlib import Path
 from typing import Dict, Any
-import json
+import orjson
 
 from .config import settings
 
+_initialized = False
+
+# Template returned by _json_format; the line itself is built in extra["_json"]
+_JSON_TEMPLATE = "{extra[_json]}\n"
+
+def _json_format(record):
+    """Format a record as one JSON line (for Prometheus/Grafana).
+    
+    Loguru treats the returned string as a template, so the serialized record
+    is stashed in extra and referenced from the template rather than returned
+    directly.
+    """
+    extra = record["extra"]
+    get = extra.get
+    extra["_json"] = orjson.dumps({
+        "timestamp": record["time"].timestamp(),
+        "level": record["level"].name,
+        "message": record["message"],
+        "name": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "memory_stats": {
+            "elysium_size": get("elysium_size", 0),
+            "asphodel_size": get("asphodel_size", 0),
+            "lethe_size": get("lethe_size", 0)
+        },
+        "metrics": get("metrics", {})
+    }, option=orjson.OPT_NON_STR_KEYS).decode()
+    return _JSON_TEMPLATE
+
 def setup_logging():
-    """Configure logging for the application."""
+    """Configure logging for the application. Later calls are no-ops."""
+    global _initialized
+    if _initialized:
+        return
     
     # Remove default handler
     logger.remove()
@@ -20,22 +53,6 @@ def setup_logging():
         "<level>{message}</level>"
     )
     
-    # Format for JSON logging (for Prometheus/Grafana)
-    json_format = lambda record: json.dumps({
-        "timestamp": record["time"].timestamp(),
-        "level": record["level"].name,
-        "message": record["message"],
-        "name": record["name"],
-        "function": record["function"],
-        "line": record["line"],
-        "memory_stats": {
-            "elysium_size": record["extra"].get("elysium_size", 0),
-            "asphodel_size": record["extra"].get("asphodel_size", 0),
-            "lethe_size": record["extra"].get("lethe_size", 0)
-        },
-        "metrics": record["extra"].get("metrics", {})
-    })
-    
     # Console handler
     logger.add(
         sys.stdout,
@@ -44,16 +61,20 @@ def setup_logging():
         colorize=True
     )
     
+    # File handlers write through loguru's queue (enqueue=True) so the
+    # blocking file I/O happens on a background thread, not in the caller
+    
     # JSON file handler for metrics
     log_path = Path("logs/metrics")
     log_path.mkdir(parents=True, exist_ok=True)
     logger.add(
         str(log_path / "hades_metrics.json"),
-        format=json_format,
+        format=_json_format,
         level="INFO",
         rotation="1 day",
         retention="7 days",
-        filter=lambda record: "metrics" in record["extra"]
+        filter=lambda record: "metrics" in record["extra"],
+        enqueue=True
     )
     
     # Error file handler
@@ -64,8 +85,11 @@ def setup_logging():
         format=console_format,
         level="ERROR",
         rotation="1 day",
-        retention="30 days"
+        retention="30 days",
+        enqueue=True
     )
+    
+    _initialized = True
 
 def log_memory_stats(
     elysium_size: int = 0,
@@ -2,11 +2,11 @@
 Model Config Fetcher - Fetch and manage model configurations from HuggingFace Hub.
 """
 from pathlib import Path
-import json
 import time
+import orjson
 from typing import Dict, Any
 from loguru import logger
-from huggingface_hub import hf_hub_download
+from huggingface_hub import hf_hub_download, try_to_load_from_cache
 from prometheus_client import Summary
 
 from .utils import authenticate_hf
@@ -24,6 +24,8 @@ class ModelConfigFetcher:
         authenticate_hf()
         self.cache_dir = settings.HF_CONFIG_CACHE_DIR
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # In-process tier in front of the on-disk cache, by model ID
+        self._configs: Dict[str, Dict[str, Any]] = {}
         
     @CONFIG_FETCH_TIME.time()
     def fetch_config(self, model_id: str) -> Dict[str, Any]:
@@ -34,27 +36,43 @@ class ModelConfigFetcher:
             model_id: The HuggingFace model ID
             
         Returns:
-            Dict[str, Any]: Model configuration
+            Dict[str, Any]: Model configuration, shared between calls and
+            to be treated as read-only
         """
+        config = self._configs.get(model_id)
+        if config is not None:
+            return config
+            
         start_time = time.time()
         try:
-            # Check cache first
+            # Check on-disk cache first
             cache_path = self.cache_dir / f"{model_id.replace('/', '_')}_config.json"
             if cache_path.exists():
                 logger.info(f"Loading cached config for {model_id}")
-                return self._load_cached_config(cache_path)
+                config = self._load_cached_config(cache_path)
+                self._configs[model_id] = config
+                return config
             
-            # Fetch from HuggingFace
-            config_path = hf_hub_download(
+            # Use a copy already in the Hub cache, e.g. one downloaded by
+            # another process sharing HF_MODEL_CACHE_DIR, before the network
+            config_path = try_to_load_from_cache(
                 model_id,
                 "config.json",
                 cache_dir=str(settings.HF_MODEL_CACHE_DIR)
             )
-            logger.info(f"Successfully fetched config for {model_id}")
+            if not isinstance(config_path, str):
+                # Fetch from HuggingFace
+                config_path = hf_hub_download(
+                    model_id,
+                    "config.json",
+                    cache_dir=str(settings.HF_MODEL_CACHE_DIR)
+                )
+                logger.info(f"Successfully fetched config for {model_id}")
             
             # Parse and cache config
             config = self._parse_config(config_path)
             self._cache_config(cache_path, config)
+            self._configs[model_id] = config
             
             record_operation("config_fetch", "api", start_time)
             return config
@@ -66,8 +84,7 @@ class ModelConfigFetcher:
     def _parse_config(self, config_path: str) -> Dict[str, Any]:
         """Parse model configuration from file."""
         try:
-            with open(config_path, 'r') as f:
-                return json.load(f)
+            return orjson.loads(Path(config_path).read_bytes())
         except Exception as e:
             logger.error(f"Error parsing config from {config_path}: {str(e)}")
             raise
@@ -75,8 +92,8 @@ class ModelConfigFetcher:
     def _cache_config(self, cache_path: Path, config: Dict[str, Any]) -> None:
         """Cache model configuration."""
         try:
-            with open(cache_path, 'w') as f:
-                json.dump(config, f, indent=2)
+            # Compact JSON; the cache is only ever read back by this class
+            cache_path.write_bytes(orjson.dumps(config))
             logger.debug(f"Cached config to {cache_path}")
         except Exception as e:
             logger.warning(f"Failed to cache config to {cache_path}: {str(e)}")
@@ -84,8 +101,7 @@ class ModelConfigFetcher:
     def _load_cached_config(self, cache_path: Path) -> Dict[str, Any]:
         """Load cached model configuration."""
         try:
-            with open(cache_path, 'r') as f:
-                return json.load(f)
+            return orjson.loads(cache_path.read_bytes())
         except Exception as e:
             logger.warning(f"Failed to load cached config from {cache_path}: {str(e)}")
             # If cache is corrupted, remove it
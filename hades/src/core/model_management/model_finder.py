@@ -1,7 +1,7 @@
 """
 Model Finder - Search for models on Hugging Face Hub based on configurable parameters.
 """
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 import time
 from loguru import logger
@@ -15,13 +15,22 @@ from ..config import settings
 # Metrics
 MODEL_SEARCH_TIME = Summary('model_search_seconds', 'Time spent searching for models')
 
+# How long a search result is reused before the Hub is queried again
+_SEARCH_CACHE_TTL = 60.0
+
 class ModelFinder:
     """Class for searching and filtering models from HuggingFace Hub."""
     
     def __init__(self, config: ModelConfig):
         """Initialize ModelFinder with search configuration."""
         self.config = config
+        # Lowercased once here rather than per model in _matches_criteria
+        self._required_keywords = [kw.lower() for kw in config.required_keywords]
+        self._excluded_keywords = [kw.lower() for kw in config.excluded_keywords]
+        self._model_types = frozenset(mt.lower() for mt in config.model_types)
         self.api = HfApi()
+        # (monotonic time, results) of the last successful search
+        self._last_search: Optional[Tuple[float, List[Dict[str, Any]]]] = None
         authenticate_hf()
         
     @MODEL_SEARCH_TIME.time()
@@ -29,15 +38,28 @@ class ModelFinder:
         """
         Search for models matching configuration criteria.
         
+        Results are reused for _SEARCH_CACHE_TTL seconds.
+        
         Returns:
             List[Dict[str, Any]]: List of matching model information
         """
+        if self._last_search is not None:
+            searched_at, results = self._last_search
+            if time.monotonic() - searched_at < _SEARCH_CACHE_TTL:
+                return results
+                
         start_time = time.time()
         try:
-            models = self.api.list_models()
+            # Let the Hub narrow the listing when there is a single model type
+            # or required keyword (several of either are OR-ed, which the Hub
+            # can't express); _filter_results still applies every criterion
+            task = next(iter(self._model_types)) if len(self._model_types) == 1 else None
+            keyword = self._required_keywords[0] if len(self._required_keywords) == 1 else None
+            models = self.api.list_models(filter=task, search=keyword)
             filtered_models = self._filter_results(models)
             logger.info(f"Found {len(filtered_models)} matching models")
             record_operation("model_search", "api", start_time)
+            self._last_search = (time.monotonic(), filtered_models)
             return filtered_models
         except Exception as e:
             logger.error(f"Error searching models: {str(e)}")
@@ -65,19 +87,21 @@ class ModelFinder:
         
     def _matches_criteria(self, model: Any) -> bool:
         """Check if model matches the search criteria."""
+        model_id = model.modelId.lower()
+        
         # Check required keywords
-        if self.config.required_keywords:
-            if not any(kw.lower() in model.modelId.lower() for kw in self.config.required_keywords):
+        if self._required_keywords:
+            if not any(kw in model_id for kw in self._required_keywords):
                 return False
                 
         # Check excluded keywords
-        if self.config.excluded_keywords:
-            if any(kw.lower() in model.modelId.lower() for kw in self.config.excluded_keywords):
+        if self._excluded_keywords:
+            if any(kw in model_id for kw in self._excluded_keywords):
                 return False
                 
-        # Check model types
-        if self.config.model_types:
-            if not any(mt.lower() == model.pipeline_tag.lower() for mt in self.config.model_types):
+        # Check model types; models without a pipeline tag match none
+        if self._model_types:
+            if (model.pipeline_tag or "").lower() not in self._model_types:
                 return False
                 
         return True
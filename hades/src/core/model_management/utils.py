@@ -3,14 +3,17 @@ Common utilities for model management operations.
 """
 from pathlib import Path
 from typing import Dict, Any, List
+import orjson
 from loguru import logger
 from huggingface_hub import login
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from ..config import settings
 
 class ModelConfig(BaseModel):
     """Pydantic model for model search configuration."""
+    model_config = ConfigDict(frozen=True, extra='ignore')
+    
     min_size: float = 0.0
     max_size: float = float('inf')
     required_keywords: List[str] = []
@@ -34,7 +37,7 @@ def authenticate_hf() -> None:
 def load_config(config_path: Path) -> ModelConfig:
     """Load and validate model configuration."""
     try:
-        return ModelConfig.parse_file(config_path)
+        return ModelConfig.model_validate(orjson.loads(config_path.read_bytes()))
     except Exception as e:
         logger.error(f"Error loading config from {config_path}: {str(e)}")
         raise
@@ -1,18 +1,29 @@
 """Monitoring utilities for HADES."""
-from typing import Callable
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import os
 from fastapi import FastAPI, Request, Response
 from prometheus_client import (
     Counter, Histogram, Gauge,
     generate_latest, CONTENT_TYPE_LATEST,
-    CollectorRegistry
+    CollectorRegistry, multiprocess
 )
 import time
+import pynvml
 from loguru import logger
 
+from .config import settings
+
 # Create a new registry
 REGISTRY = CollectorRegistry(auto_describe=True)
 
-# Request metrics
+# With several API workers, set PROMETHEUS_MULTIPROC_DIR (to an empty directory)
+# before start-up: each worker then records into its own memory-mapped files,
+# with no lock shared between workers, and a scrape merges them
+_MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# Request metrics. Label values stay bounded: endpoint is a route template or
+# "unmatched", status an HTTP status code
 REQUEST_COUNT = Counter(
     "hades_request_count",
     "Number of requests received",
@@ -24,6 +35,7 @@ REQUEST_LATENCY = Histogram(
     "hades_request_latency_seconds",
     "Request latency in seconds",
     ["method", "endpoint"],
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0],
     registry=REGISTRY
 )
 
@@ -35,23 +47,30 @@ QUERY_COUNT = Counter(
     registry=REGISTRY
 )
 
+# Finer resolution below 300ms, where cached and small-k queries land, costs
+# six more series and is opt-in
 QUERY_LATENCY = Histogram(
     "hades_rag_query_latency_seconds",
     "RAG query latency in seconds",
-    buckets=[0.1, 0.5, 1.0, 2.0, 5.0, 10.0, float("inf")],
+    buckets=(
+        [0.025, 0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.5, 1.0, 2.0, 5.0, 10.0, float("inf")]
+        if settings.PROMETHEUS_FINE_GRAINED_LATENCY_BUCKETS
+        else [0.1, 0.5, 1.0, 2.0, 5.0, 10.0, float("inf")]
+    ),
     registry=REGISTRY
 )
 
 DOCUMENT_COUNT = Gauge(
     "hades_document_count",
     "Number of documents in the system",
+    multiprocess_mode="livemax",
     registry=REGISTRY
 )
 
 EMBEDDING_LATENCY = Histogram(
     "hades_embedding_latency_seconds",
     "Time taken to generate embeddings",
-    buckets=[0.1, 0.5, 1.0, 2.0, 5.0],
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0],
     registry=REGISTRY
 )
 
@@ -65,7 +84,7 @@ CONTEXT_LENGTH = Histogram(
 MODEL_INFERENCE_LATENCY = Histogram(
     "hades_model_inference_latency_seconds",
     "Time taken for model inference",
-    buckets=[0.1, 0.5, 1.0, 2.0, 5.0, 10.0],
+    buckets=[0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0],
     registry=REGISTRY
 )
 
@@ -74,6 +93,7 @@ GPU_MEMORY_USAGE = Gauge(
     "hades_gpu_memory_usage_bytes",
     "GPU memory usage in bytes",
     ["device"],
+    multiprocess_mode="livemax",
     registry=REGISTRY
 )
 
@@ -81,14 +101,39 @@ GPU_UTILIZATION = Gauge(
     "hades_gpu_utilization_percent",
     "GPU utilization percentage",
     ["device"],
+    multiprocess_mode="livemax",
     registry=REGISTRY
 )
 
+# Labelled children of REQUEST_COUNT and REQUEST_LATENCY by (method, endpoint,
+# status), so each request skips the labels() lookup. Capped as a safeguard;
+# past the cap, children are looked up per request as before
+_REQUEST_CHILDREN: Dict[Tuple[str, str, int], Tuple[Any, Any]] = {}
+_REQUEST_CHILDREN_MAX = 1024
+
+def _request_children(method: str, endpoint: str, status: int) -> Tuple[Any, Any]:
+    """Return the request counter and latency children for a label set."""
+    key = (method, endpoint, status)
+    children = _REQUEST_CHILDREN.get(key)
+    if children is None:
+        children = (
+            REQUEST_COUNT.labels(method, endpoint, status),
+            REQUEST_LATENCY.labels(method, endpoint)
+        )
+        if len(_REQUEST_CHILDREN) < _REQUEST_CHILDREN_MAX:
+            _REQUEST_CHILDREN[key] = children
+    return children
+
 async def metrics_middleware(
     request: Request,
     call_next: Callable
 ) -> Response:
     """Middleware to collect request metrics."""
+    # Scrapes are not application traffic; timing them would only add the
+    # exporter's own work to the request histograms
+    if request.scope.get("path") == "/metrics":
+        return await call_next(request)
+
     start_time = time.time()
     
     response = await call_next(request)
@@ -96,69 +141,95 @@ async def metrics_middleware(
     # Record request duration
     duration = time.time() - start_time
     
-    # Extract endpoint pattern
+    # Extract endpoint pattern; unmatched paths share one label value so
+    # arbitrary URLs (404s, scanners) can't create new series
     route = request.scope.get("route")
-    endpoint = route.path if route else request.url.path
+    endpoint = route.path if route else "unmatched"
     
     # Update metrics
-    REQUEST_COUNT.labels(
-        method=request.method,
-        endpoint=endpoint,
-        status=response.status_code
-    ).inc()
-    
-    REQUEST_LATENCY.labels(
-        method=request.method,
-        endpoint=endpoint
-    ).observe(duration)
+    count, latency = _request_children(request.method, endpoint, response.status_code)
+    count.inc()
+    latency.observe(duration)
     
     return response
 
+# NVML device handles, looked up once by start_monitoring; empty without GPUs
+_gpu_handles: List[Any] = []
+# Background task refreshing the GPU gauges, independently of scrapes
+_gpu_sampler: Optional[asyncio.Task] = None
+
+def _init_nvml() -> None:
+    """Initialize NVML and cache a handle per GPU."""
+    try:
+        pynvml.nvmlInit()
+        _gpu_handles[:] = [
+            pynvml.nvmlDeviceGetHandleByIndex(i)
+            for i in range(pynvml.nvmlDeviceGetCount())
+        ]
+    except pynvml.NVMLError as e:
+        logger.info(f"NVML unavailable, GPU metrics disabled: {e}")
+
+async def _sample_gpu_metrics(interval: float) -> None:
+    """Refresh the GPU gauges every interval seconds until cancelled."""
+    while True:
+        await update_gpu_metrics()
+        await asyncio.sleep(interval)
+
+def start_monitoring() -> None:
+    """Initialize NVML and start sampling GPU metrics in the background."""
+    global _gpu_sampler
+    _init_nvml()
+    if _gpu_handles and _gpu_sampler is None:
+        _gpu_sampler = asyncio.create_task(
+            _sample_gpu_metrics(settings.GPU_POLL_INTERVAL_SECONDS)
+        )
+
+def shutdown_monitoring() -> None:
+    """Stop GPU sampling and release NVML."""
+    global _gpu_sampler
+    if _gpu_sampler is not None:
+        _gpu_sampler.cancel()
+        _gpu_sampler = None
+    if _gpu_handles:
+        _gpu_handles.clear()
+        pynvml.nvmlShutdown()
+    if _MULTIPROCESS:
+        # Drop this worker's live gauge files
+        multiprocess.mark_process_dead(os.getpid())
+
+def _collect_metrics() -> bytes:
+    """Serialize current metrics, merged across workers in multiprocess mode."""
+    if _MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
 async def update_gpu_metrics():
     """Update GPU metrics."""
-    try:
-        import torch
-        if not torch.cuda.is_available():
-            return
-            
-        for i in range(torch.cuda.device_count()):
-            memory_allocated = torch.cuda.memory_allocated(i)
-            memory_reserved = torch.cuda.memory_reserved(i)
-            
+    for i, handle in enumerate(_gpu_handles):
+        try:
             GPU_MEMORY_USAGE.labels(device=f"cuda:{i}").set(
-                memory_allocated
+                pynvml.nvmlDeviceGetMemoryInfo(handle).used
+            )
+            GPU_UTILIZATION.labels(device=f"cuda:{i}").set(
+                pynvml.nvmlDeviceGetUtilizationRates(handle).gpu
             )
-            
-            # Get GPU utilization using nvidia-smi
-            import subprocess
-            try:
-                result = subprocess.run(
-                    [
-                        "nvidia-smi",
-                        f"--query-gpu=utilization.gpu",
-                        "--format=csv,noheader,nounits"
-                    ],
-                    capture_output=True,
-                    text=True
-                )
-                utilization = float(result.stdout.strip())
-                GPU_UTILIZATION.labels(device=f"cuda:{i}").set(
-                    utilization
-                )
-            except Exception as e:
-                logger.warning(f"Failed to get GPU utilization: {e}")
-                
-    except Exception as e:
-        logger.warning(f"Failed to update GPU metrics: {e}")
+        except pynvml.NVMLError as e:
+            logger.warning(f"Failed to update GPU metrics: {e}")
 
 def init_monitoring(app: FastAPI):
-    """Initialize monitoring for FastAPI app."""
+    """Initialize monitoring for FastAPI app.
+    
+    GPU metrics are sampled in the background between start_monitoring and
+    shutdown_monitoring, which the app's lifespan calls; scrapes serve the
+    latest sample.
+    """
     # Add metrics endpoint
     @app.get("/metrics")
     async def metrics():
-        await update_gpu_metrics()
         return Response(
-            generate_latest(REGISTRY),
+            _collect_metrics(),
             media_type=CONTENT_TYPE_LATEST
         )
     
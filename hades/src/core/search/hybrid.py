@@ -11,14 +11,16 @@
 #    - Consider query intent classification for context weighting
 #    - Implement adaptive context boost based on query characteristics
 
+import time
 from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
 from loguru import logger
 from prometheus_client import Summary, Counter, Histogram
 
 from core.config import settings
 from core.context import analyze_context, AnalysisResult
 from core.embeddings import EmbeddingModel
-from db import VectorStore
+from db import VectorStore, ContextFilter
 from memory_management.manager import MemoryManager
 
 # Metrics
@@ -73,7 +75,7 @@ async def hybrid_search(
             )
             
             # Prepare metadata filter based on context
-            metadata_filter = build_metadata_filter(
+            context_filter = build_metadata_filter(
                 context_analysis,
                 memory_items
             )
@@ -82,7 +84,7 @@ async def hybrid_search(
             vector_results = await vector_store.search(
                 query_vector=query_vector,
                 k=top_k * 2,  # Get more results for reranking
-                metadata_filter=metadata_filter
+                context_filter=context_filter
             )
             
             # Rerank results using context
@@ -90,7 +92,8 @@ async def hybrid_search(
                 vector_results,
                 context_analysis,
                 memory_items,
-                context_boost
+                context_boost,
+                top_k=top_k
             )
             
             # Filter and sort final results
@@ -115,7 +118,7 @@ async def hybrid_search(
         logger.error(f"Hybrid search failed: {str(e)}")
         return []
 
-async def get_query_vector(query: str) -> Optional[List[float]]:
+async def get_query_vector(query: str) -> Optional[np.ndarray]:
     """
     Get vector embedding for query.
     
@@ -123,14 +126,10 @@ async def get_query_vector(query: str) -> Optional[List[float]]:
         query: Input text to embed
         
     Returns:
-        List of floats representing the embedding vector
+        float32 array holding the embedding vector
     """
     try:
-        # Check cache first
-        if cached := _embedding_model.get_cached_embedding(query):
-            return cached
-            
-        # Generate new embedding
+        # Served from the model's embedding cache when possible
         return await _embedding_model.generate(
             query,
             pooling=settings.EMBEDDING_POOLING
@@ -166,108 +165,144 @@ async def get_memory_context(
 def build_metadata_filter(
     context: AnalysisResult,
     memory_items: Dict[str, Any]
-) -> Dict[str, Any]:
-    """Build ArangoDB filter based on context."""
+) -> ContextFilter:
+    """Build vector store filter conditions based on context."""
     try:
-        filter_conditions = {}
-        
-        # Add relevance threshold
-        filter_conditions["relevance_score"] = {
-            ">=": settings.TARTARUS_RELEVANCE_THRESHOLD
-        }
-        
-        # Add context-based conditions
-        if context.metadata.semantics:
-            filter_conditions["semantic_type"] = {
-                "IN": list(context.metadata.semantics.keys())
-            }
-            
-        # Add relationship-based conditions
-        if context.metadata.relationships:
-            filter_conditions["related_to"] = {
-                "IN": list(memory_items.keys())
-            }
-            
-        return filter_conditions
+        return ContextFilter(
+            # Relevance threshold
+            min_relevance=settings.TARTARUS_RELEVANCE_THRESHOLD,
+            # Context-based condition
+            semantic_types=(
+                list(context.metadata.semantics)
+                if context.metadata.semantics else None
+            ),
+            # Relationship-based condition; skipped when no memory items were
+            # found, since an empty list would match nothing
+            related_to=(
+                list(memory_items)
+                if context.metadata.relationships and memory_items else None
+            )
+        )
         
     except Exception as e:
         logger.error(f"Failed to build metadata filter: {str(e)}")
-        return {}
+        return ContextFilter()
 
 def rerank_results(
     vector_results: List[Tuple[str, float, Dict[str, Any]]],
     context: AnalysisResult,
     memory_items: Dict[str, Any],
-    context_boost: float
+    context_boost: float,
+    top_k: Optional[int] = None
 ) -> List[Tuple[str, float, Dict[str, Any], float]]:
     """
     Rerank search results using context information.
     
+    Args:
+        vector_results: (id, vector_score, metadata) tuples from the vector store
+        context: Analysis of the query context
+        memory_items: Items retrieved from the memory tiers
+        context_boost: Weight for context-based boost (0-1)
+        top_k: If given, only the best top_k results are returned
+    
     Returns:
         List of tuples (id, combined_score, metadata, context_score)
     """
     try:
-        reranked = []
+        n = len(vector_results)
+        if n == 0:
+            return []
         
-        for result_id, vector_score, metadata in vector_results:
-            # Calculate context score
-            context_score = calculate_context_score(
-                metadata,
-                context,
-                memory_items
-            )
-            
-            # Combine scores
-            combined_score = (
-                (1 - context_boost) * vector_score +
-                context_boost * context_score
+        vector_scores = np.fromiter(
+            (result[1] for result in vector_results),
+            dtype=np.float64,
+            count=n
+        )
+        context_scores = calculate_context_score_batch(
+            [result[2] for result in vector_results],
+            context,
+            memory_items
+        )
+        
+        # Combine scores
+        combined = (1 - context_boost) * vector_scores + context_boost * context_scores
+        
+        # Select the winners without fully sorting the candidates, then order them
+        if top_k is not None and top_k < n:
+            order = np.argpartition(-combined, top_k)[:top_k]
+            order = order[np.argsort(-combined[order], kind="stable")]
+        else:
+            order = np.argsort(-combined, kind="stable")
+        
+        return [
+            (
+                vector_results[i][0],
+                float(combined[i]),
+                vector_results[i][2],
+                float(context_scores[i])
             )
-            
-            reranked.append((
-                result_id,
-                combined_score,
-                metadata,
-                context_score
-            ))
-            
-        # Sort by combined score
-        reranked.sort(key=lambda x: x[1], reverse=True)
-        return reranked
+            for i in order.tolist()
+        ]
         
     except Exception as e:
         logger.error(f"Failed to rerank results: {str(e)}")
         return [(r[0], r[1], r[2], 0.0) for r in vector_results]
 
-def calculate_context_score(
-    metadata: Dict[str, Any],
+def calculate_context_score_batch(
+    metadatas: List[Dict[str, Any]],
     context: AnalysisResult,
     memory_items: Dict[str, Any]
-) -> float:
-    """Calculate context-based relevance score."""
+) -> np.ndarray:
+    """
+    Calculate context-based relevance scores for a batch of results.
+    
+    Args:
+        metadatas: Metadata of each search result
+        context: Analysis of the query context
+        memory_items: Items retrieved from the memory tiers
+        
+    Returns:
+        Array with one context score per result
+    """
+    n = len(metadatas)
     try:
-        score = 0.0
+        # Query-side sets are built once for the whole batch
+        context_semantics = frozenset(context.metadata.semantics)
+        memory_keys = frozenset(memory_items)
+        
+        semantic_overlap = np.zeros(n, dtype=np.float64)
+        relationship_overlap = np.zeros(n, dtype=np.float64)
+        last_access = np.zeros(n, dtype=np.float64)
+        for i, metadata in enumerate(metadatas):
+            if context_semantics:
+                semantic_overlap[i] = len(
+                    context_semantics.intersection(metadata.get("semantics", {}))
+                )
+            if memory_keys:
+                relationship_overlap[i] = len(
+                    memory_keys.intersection(metadata.get("related_to", []))
+                )
+            last_access[i] = metadata.get("last_access", 0) or 0
+        
+        scores = np.zeros(n, dtype=np.float64)
         
         # Semantic similarity
-        if semantic_overlap := len(
-            set(metadata.get("semantics", {})) &
-            set(context.metadata.semantics)
-        ):
-            score += 0.4 * (semantic_overlap / len(context.metadata.semantics))
+        if context_semantics:
+            scores += 0.4 * (semantic_overlap / len(context_semantics))
             
         # Relationship strength
-        if relationship_overlap := len(
-            set(metadata.get("related_to", [])) &
-            set(memory_items.keys())
-        ):
-            score += 0.4 * (relationship_overlap / len(memory_items))
+        if memory_keys:
+            scores += 0.4 * (relationship_overlap / len(memory_keys))
             
         # Recency and access patterns
-        if access_time := metadata.get("last_access", 0):
-            time_factor = 1.0 / (1.0 + (time.time() - access_time) / 3600)
-            score += 0.2 * time_factor
+        accessed = last_access != 0
+        if accessed.any():
+            now = time.time()
+            time_factor = 1.0 / (1.0 + (now - last_access[accessed]) / 3600)
+            scores[accessed] += 0.2 * time_factor
             
-        return score
+        return scores
         
     except Exception as e:
-        logger.error(f"Failed to calculate context score: {str(e)}")
-        return 0.0
+        logger.error(f"Failed to calculate context scores: {str(e)}")
+        return np.zeros(n, dtype=np.float64)
@@ -1,9 +1,13 @@
 """Database module with ArangoDB and vector store integration."""
 
+from ._client import get_arango_client, close_arango_client
 from .arango import ArangoDB
-from .vector import VectorStore
+from .vector import VectorStore, ContextFilter
 
 __all__ = [
     'ArangoDB',
-    'VectorStore'
+    'VectorStore',
+    'ContextFilter',
+    'get_arango_client',
+    'close_arango_client'
 ]
@@ -0,0 +1,34 @@
+"""Process-wide ArangoDB client."""
+
+from functools import lru_cache
+from typing import Any
+
+import orjson
+from arango import ArangoClient
+from arango.http import DefaultHTTPClient
+
+from core.config import settings
+
+# Database calls run on asyncio.to_thread workers, so the shared HTTP session
+# needs room for many concurrent connections to the server
+_POOL_MAXSIZE = 64
+
+def _dumps(obj: Any) -> str:
+    """Serialize a request body; numpy arrays are written without tolist()."""
+    return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+@lru_cache(maxsize=1)
+def get_arango_client() -> ArangoClient:
+    """Return the client shared by every ArangoDB instance in the process."""
+    return ArangoClient(
+        hosts=f"http://{settings.ARANGO_HOST}:{settings.ARANGO_PORT}",
+        http_client=DefaultHTTPClient(pool_maxsize=_POOL_MAXSIZE),
+        serializer=_dumps,
+        deserializer=orjson.loads
+    )
+
+def close_arango_client() -> None:
+    """Close the shared client's HTTP sessions; the next call makes a new one."""
+    if get_arango_client.cache_info().currsize:
+        get_arango_client().close()
+        get_arango_client.cache_clear()
@@ -1,37 +1,138 @@
-from typing import Any, Dict, List, Optional
-from arango import ArangoClient
+from typing import Any, Dict, List, Optional, Tuple, Union
+import asyncio
+import re
+import numpy as np
 from loguru import logger
 from datetime import datetime
 
 from core.config import settings
+from ._client import get_arango_client
+
+# Buffered writes are coalesced into insert_many batches of at most this many
+# documents, gathered over at most this many seconds
+_WRITE_BATCH_SIZE = 1000
+_WRITE_FLUSH_INTERVAL = 0.01
+_WRITE_QUEUE_SIZE = 10_000
+
+# The vector index is trained on the documents present when it is created, so
+# it is only created once the collection holds at least this many (one per
+# inverted list); until then searches compute exact distances
+_VECTOR_INDEX_LISTS = 100
+
+# Vector indexes and APPROX_NEAR_COSINE need ArangoDB 3.12.4 or later, started
+# with --experimental-vector-index, and python-arango 8. Against anything older
+# (such as the arangodb:3.11 compose service) searches stay exact
+_VECTOR_INDEX_MIN_SERVER = (3, 12, 4)
+
+_EMBEDDING_DIMENSION_AQL = """
+FOR doc IN vectors
+LIMIT 1
+RETURN LENGTH(doc.embedding)
+"""
+
+# Query texts are fixed; everything that varies per call, including metadata
+# filter keys, is a bind parameter
+_APPROX_SEARCH_AQL = """
+FOR doc IN vectors
+LET similarity = APPROX_NEAR_COSINE(doc.embedding, @query_vector)
+SORT similarity DESC
+LIMIT @k
+FILTER @min_similarity == null OR similarity >= @min_similarity
+RETURN {
+    text: doc.text,
+    distance: 1 - similarity,
+    metadata: doc.metadata,
+    chunk_id: doc._key,
+    parent_id: doc.parent_id,
+    timestamp: doc.timestamp
+}
+"""
+
+_EXACT_SEARCH_TEMPLATE = """
+FOR doc IN vectors
+LET distance = 1 - COSINE_SIMILARITY(doc.embedding, @query_vector)
+FILTER @max_distance == null OR distance <= @max_distance
+{metadata_filter}
+SORT distance
+LIMIT @k
+RETURN {{
+    text: doc.text,
+    distance: distance,
+    metadata: doc.metadata,
+    chunk_id: doc._key,
+    parent_id: doc.parent_id,
+    timestamp: doc.timestamp
+}}
+"""
+_EXACT_SEARCH_AQL = _EXACT_SEARCH_TEMPLATE.format(metadata_filter="")
+_EXACT_FILTERED_SEARCH_AQL = _EXACT_SEARCH_TEMPLATE.format(
+    metadata_filter="FILTER MATCHES(doc.metadata, @metadata_filter)"
+)
+
+_VECTORS_BY_PARENT_AQL = """
+FOR doc IN vectors
+FILTER doc.parent_id IN @parent_ids
+RETURN {
+    text: doc.text,
+    metadata: doc.metadata,
+    chunk_id: doc._key,
+    parent_id: doc.parent_id,
+    timestamp: doc.timestamp
+}
+"""
+
+_DELETE_BY_PARENT_AQL = """
+FOR doc IN vectors
+FILTER doc.parent_id == @parent_id
+REMOVE doc IN vectors
+"""
 
 class ArangoDB:
     def __init__(self):
-        self.client = ArangoClient(
-            hosts=f"http://{settings.ARANGO_HOST}:{settings.ARANGO_PORT}"
-        )
+        # Shared with other instances; closed by close_arango_client()
+        self.client = get_arango_client()
         self.db = None
+        self._data = None
+        self._vectors = None
+        self._vector_index = False
+        # Set once index creation fails, so later writes don't retry it
+        self._vector_index_unavailable = False
+        # Vectors known to be stored, read by _ensure_vector_index and advanced
+        # by store_vectors, so writes below the index threshold cost no queries
+        self._vector_count = 0
+        # Buffered writes not yet acknowledged by the server, by key, so reads
+        # see them before the batch lands
+        self._pending: Dict[str, Dict] = {}
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
         
     async def connect(self) -> bool:
         """Connect to ArangoDB and initialize database."""
         try:
-            sys_db = self.client.db(
-                "_system",
-                username=settings.ARANGO_USER,
-                password=settings.ARANGO_PASSWORD
-            )
-            
-            if not sys_db.has_database(settings.ARANGO_DB):
-                sys_db.create_database(settings.ARANGO_DB)
+            # Database setup makes blocking requests; run it off the event loop
+            def open_database():
+                sys_db = self.client.db(
+                    "_system",
+                    username=settings.ARANGO_USER,
+                    password=settings.ARANGO_PASSWORD
+                )
                 
-            self.db = self.client.db(
-                settings.ARANGO_DB,
-                username=settings.ARANGO_USER,
-                password=settings.ARANGO_PASSWORD
-            )
+                if not sys_db.has_database(settings.ARANGO_DB):
+                    sys_db.create_database(settings.ARANGO_DB)
+                    
+                return self.client.db(
+                    settings.ARANGO_DB,
+                    username=settings.ARANGO_USER,
+                    password=settings.ARANGO_PASSWORD
+                )
+            
+            self.db = await asyncio.to_thread(open_database)
             
             # Initialize collections
             await self.init_collections()
+            self._data = self.db.collection("data")
+            self._vectors = self.db.collection("vectors")
+            await self._ensure_vector_index()
                 
             logger.info("Successfully connected to ArangoDB")
             return True
@@ -42,49 +143,167 @@ class ArangoDB:
 
     async def init_collections(self) -> bool:
         """Initialize all required collections."""
-        try:
+        def create_collections() -> None:
             # Basic data collection
             if not self.db.has_collection("data"):
                 self.db.create_collection("data")
             
             # Vector collection for embeddings
             if not self.db.has_collection("vectors"):
-                vectors = self.db.create_collection("vectors")
-                # Create HNSW index for vector similarity search
-                vectors.add_index({
-                    "type": "vector",
-                    "fields": ["embedding"],
-                    "algorithm": "hnsw",
-                    "params": {
-                        "maxElements": 1000000,
-                        "efConstruction": 128,
-                        "ef": 64,
-                        "M": 16
-                    }
-                })
-                logger.info("Created vectors collection with HNSW index")
+                self.db.create_collection("vectors")
+                logger.info("Created vectors collection")
             
+            # Chunk lookups and deletes go by parent document
+            self.db.collection("vectors").add_index(
+                {"type": "persistent", "fields": ["parent_id"]}
+            )
+                
+        try:
+            await asyncio.to_thread(create_collections)
             return True
         except Exception as e:
             logger.error(f"Failed to initialize collections: {str(e)}")
             return False
             
-    async def store(self, key: str, value: Any) -> bool:
+    async def _ensure_vector_index(self) -> bool:
+        """Create the vector index once there is enough data to train it.
+        
+        Runs on connect, then again only when store_vectors brings the tracked
+        vector count up to the threshold.
+        """
+        if self._vector_index or self._vector_index_unavailable:
+            return self._vector_index
+            
+        def ensure() -> bool:
+            if any(index["type"] == "vector" for index in self._vectors.indexes()):
+                return True
+            version = self.db.version()
+            if tuple(map(int, re.findall(r"\d+", version)[:3])) < _VECTOR_INDEX_MIN_SERVER:
+                raise RuntimeError(f"ArangoDB {version} has no vector index support")
+            self._vector_count = self._vectors.count()
+            if self._vector_count < _VECTOR_INDEX_LISTS:
+                return False
+            # Sized to the stored embeddings, whichever model produced them
+            dimension = next(self.db.aql.execute(_EMBEDDING_DIMENSION_AQL))
+            self._vectors.add_index({
+                "type": "vector",
+                "fields": ["embedding"],
+                "params": {
+                    "metric": "cosine",
+                    "dimension": dimension,
+                    "nLists": _VECTOR_INDEX_LISTS
+                }
+            })
+            logger.info(f"Created {dimension}-d vector index on vectors.embedding")
+            return True
+            
+        try:
+            self._vector_index = await asyncio.to_thread(ensure)
+        except Exception as e:
+            self._vector_index_unavailable = True
+            logger.warning(f"Vector index unavailable, searches stay exact: {str(e)}")
+        return self._vector_index
+            
+    @staticmethod
+    def _make_doc(key: str, value: Any, metadata: Optional[Dict]) -> Dict:
+        doc = {"_key": key, "value": value}
+        if metadata is not None:
+            doc["metadata"] = metadata
+        return doc
+            
+    async def store(self, key: str, value: Any, metadata: Optional[Dict] = None) -> bool:
         """Store data in ArangoDB."""
         try:
-            collection = self.db.collection("data")
-            doc = {"_key": key, "value": value}
-            collection.insert(doc, overwrite=True)
+            doc = self._make_doc(key, value, metadata)
+            await asyncio.to_thread(self._data.insert, doc, overwrite=True)
             return True
         except Exception as e:
             logger.error(f"Failed to store data in ArangoDB: {str(e)}")
             return False
+    
+    async def store_buffered(
+        self,
+        key: str,
+        value: Any,
+        metadata: Optional[Dict] = None
+    ) -> bool:
+        """
+        Queue data for a batched write to ArangoDB.
+        
+        The document is written by a background task together with other
+        queued documents. Reads through this instance see it immediately;
+        call flush() to wait until it has been written.
+        """
+        if self._writer is None:
+            self._write_queue = asyncio.Queue(maxsize=_WRITE_QUEUE_SIZE)
+            self._writer = asyncio.create_task(self._drain_writes())
+            
+        doc = self._make_doc(key, value, metadata)
+        self._pending[key] = doc
+        await self._write_queue.put(doc)
+        return True
+    
+    async def _drain_writes(self) -> None:
+        """Write queued documents in batches until cancelled."""
+        queue = self._write_queue
+        while True:
+            batch = [await queue.get()]
+            # Give concurrent writers a moment to add to this batch
+            await asyncio.sleep(_WRITE_FLUSH_INTERVAL)
+            while len(batch) < _WRITE_BATCH_SIZE:
+                try:
+                    batch.append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                await self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+    
+    async def _write_batch(self, batch: List[Dict]) -> None:
+        # Keep only the latest document per key
+        docs = list({doc["_key"]: doc for doc in batch}.values())
+        try:
+            results = await asyncio.to_thread(
+                self._data.insert_many, docs, overwrite=True
+            )
+            failed = sum(isinstance(result, Exception) for result in results)
+            if failed:
+                logger.error(f"Failed to store {failed} of {len(docs)} buffered documents in ArangoDB")
+        except Exception as e:
+            logger.error(f"Failed to store buffered data in ArangoDB: {str(e)}")
+        finally:
+            for doc in batch:
+                if self._pending.get(doc["_key"]) is doc:
+                    del self._pending[doc["_key"]]
+    
+    async def flush(self) -> None:
+        """Wait until all buffered writes have been sent to ArangoDB."""
+        if self._write_queue is not None:
+            await self._write_queue.join()
+    
+    async def close(self) -> None:
+        """Flush buffered writes and stop the writer.
+        
+        The HTTP sessions belong to the shared client and stay open.
+        """
+        await self.flush()
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
+            self._write_queue = None
             
     async def retrieve(self, key: str) -> Optional[Any]:
         """Retrieve data from ArangoDB."""
+        if (doc := self._pending.get(key)) is not None:
+            return doc["value"]
         try:
-            collection = self.db.collection("data")
-            doc = collection.get(key)
+            doc = await asyncio.to_thread(self._data.get, key)
             return doc["value"] if doc else None
         except Exception as e:
             logger.error(f"Failed to retrieve data from ArangoDB: {str(e)}")
@@ -93,13 +312,34 @@ class ArangoDB:
     async def delete(self, key: str) -> bool:
         """Delete data from ArangoDB."""
         try:
-            collection = self.db.collection("data")
-            collection.delete(key)
+            # A queued write for this key would otherwise land after the delete
+            if key in self._pending:
+                await self.flush()
+            await asyncio.to_thread(self._data.delete, key)
             return True
         except Exception as e:
             logger.error(f"Failed to delete data from ArangoDB: {str(e)}")
             return False
 
+    def _make_vector_doc(
+        self,
+        text: str,
+        embedding: List[float],
+        metadata: Optional[Dict],
+        chunk_id: Optional[str],
+        parent_id: Optional[str]
+    ) -> Dict:
+        return {
+            "_key": chunk_id if chunk_id else str(hash(text)),
+            "text": text,
+            # Stored as float32: orjson writes each component with float32
+            # precision, roughly halving the JSON for an embedding
+            "embedding": np.asarray(embedding, dtype=np.float32),
+            "metadata": metadata or {},
+            "parent_id": parent_id,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
     async def store_vector(
         self,
         text: str,
@@ -110,68 +350,108 @@ class ArangoDB:
     ) -> bool:
         """Store a vector embedding with its text and metadata."""
         try:
-            collection = self.db.collection("vectors")
-            doc = {
-                "_key": chunk_id if chunk_id else str(hash(text)),
-                "text": text,
-                "embedding": embedding,
-                "metadata": metadata or {},
-                "parent_id": parent_id,
-                "timestamp": datetime.utcnow().isoformat()
-            }
-            collection.insert(doc, overwrite=True)
+            doc = self._make_vector_doc(text, embedding, metadata, chunk_id, parent_id)
+            await asyncio.to_thread(self._vectors.insert, doc, overwrite=True)
             logger.debug(f"Stored vector for chunk_id: {doc['_key']}")
             return True
         except Exception as e:
             logger.error(f"Failed to store vector: {str(e)}")
             return False
 
+    async def store_vectors(
+        self,
+        vectors: List[Tuple[str, List[float], Optional[Dict], Optional[str]]],
+        parent_id: Optional[str] = None
+    ) -> int:
+        """
+        Store several vector embeddings with one bulk import per batch.
+        
+        Args:
+            vectors: (text, embedding, metadata, chunk_id) tuples
+            parent_id: Parent document shared by all vectors
+            
+        Returns:
+            Number of vectors stored
+        """
+        docs = [
+            self._make_vector_doc(text, embedding, metadata, chunk_id, parent_id)
+            for text, embedding, metadata, chunk_id in vectors
+        ]
+        stored = 0
+        for start in range(0, len(docs), _WRITE_BATCH_SIZE):
+            batch = docs[start:start + _WRITE_BATCH_SIZE]
+            try:
+                # The import API answers with counts rather than a result per
+                # document, keeping the response small
+                result = await asyncio.to_thread(
+                    self._vectors.import_bulk,
+                    batch,
+                    on_duplicate="replace",
+                    halt_on_error=False
+                )
+                if result["errors"]:
+                    logger.error(f"Failed to store {result['errors']} of {len(batch)} vectors")
+                stored += result["created"] + result["updated"]
+            except Exception as e:
+                logger.error(f"Failed to store vectors: {str(e)}")
+        logger.debug(f"Stored {stored} vectors for parent_id: {parent_id}")
+        self._vector_count += stored
+        if self._vector_count >= _VECTOR_INDEX_LISTS:
+            await self._ensure_vector_index()
+        return stored
+
     async def search_vectors(
         self,
-        query_vector: List[float],
+        query_vector: Union[List[float], np.ndarray],
         k: int = 3,
-        metadata_filter: Optional[Dict] = None
+        metadata_filter: Optional[Dict] = None,
+        max_distance: Optional[float] = None
     ) -> List[Dict]:
-        """Search for similar vectors using HNSW index."""
+        """Search for similar vectors by cosine distance.
+        
+        With max_distance, only documents within that distance of the query
+        vector are returned; without it, the k nearest are. Unfiltered
+        searches use the vector index once it exists.
+        """
         try:
-            collection = self.db.collection("vectors")
-            
-            # Build AQL query
-            aql = """
-            FOR doc IN vectors
-            SEARCH ANALYZER(VECTOR_DISTANCE(doc.embedding, @query_vector) < 1.0, "vector")
-            """
-            
-            # Add metadata filter if provided
-            if metadata_filter:
-                filter_conditions = []
-                for key, value in metadata_filter.items():
-                    filter_conditions.append(f"doc.metadata.{key} == @{key}")
-                if filter_conditions:
-                    aql += f"\nFILTER {' AND '.join(filter_conditions)}"
-            
-            # Add sorting and limit
-            aql += """
-            SORT VECTOR_DISTANCE(doc.embedding, @query_vector)
-            LIMIT @k
-            RETURN {
-                text: doc.text,
-                distance: VECTOR_DISTANCE(doc.embedding, @query_vector),
-                metadata: doc.metadata,
-                chunk_id: doc._key,
-                parent_id: doc.parent_id,
-                timestamp: doc.timestamp
-            }
-            """
-            
-            # Prepare bind vars
-            bind_vars = {"query_vector": query_vector, "k": k}
-            if metadata_filter:
-                bind_vars.update(metadata_filter)
-            
-            # Execute query
-            cursor = self.db.aql.execute(aql, bind_vars=bind_vars)
-            results = [doc for doc in cursor]
+            # Sent as float32, serialized directly from the array
+            query_vector = np.asarray(query_vector, dtype=np.float32)
+            if self._vector_index and not metadata_filter:
+                # Approximate top k from the index, then the distance bound
+                aql = _APPROX_SEARCH_AQL
+                bind_vars = {
+                    "query_vector": query_vector,
+                    "k": k,
+                    "min_similarity": (
+                        None if max_distance is None else 1.0 - max_distance
+                    )
+                }
+            else:
+                # Exact distances, computed and filtered by the server
+                bind_vars = {
+                    "query_vector": query_vector,
+                    "k": k,
+                    "max_distance": max_distance
+                }
+                if metadata_filter:
+                    aql = _EXACT_FILTERED_SEARCH_AQL
+                    bind_vars["metadata_filter"] = metadata_filter
+                else:
+                    aql = _EXACT_SEARCH_AQL
+            
+            # Execute query off the event loop. At most k documents come back,
+            # so a batch of k returns them all with the first response and
+            # the cursor never goes back to the server
+            def run_query() -> List[Dict]:
+                cursor = self.db.aql.execute(
+                    aql,
+                    bind_vars=bind_vars,
+                    batch_size=max(k, 1),
+                    count=False
+                )
+                return list(cursor)
+            
+            results = await asyncio.to_thread(run_query)
             
             logger.debug(f"Found {len(results)} similar vectors")
             return results
@@ -180,6 +460,29 @@ class ArangoDB:
             logger.error(f"Failed to search vectors: {str(e)}")
             return []
 
+    async def get_vectors_by_parent_ids(
+        self,
+        parent_ids: List[str]
+    ) -> Dict[str, List[Dict]]:
+        """Get the stored chunks of several documents, grouped by parent ID."""
+        grouped: Dict[str, List[Dict]] = {parent_id: [] for parent_id in parent_ids}
+        if not parent_ids:
+            return grouped
+        try:
+            def run_query() -> List[Dict]:
+                return list(self.db.aql.execute(
+                    _VECTORS_BY_PARENT_AQL,
+                    bind_vars={"parent_ids": list(grouped)},
+                    count=False
+                ))
+                
+            for doc in await asyncio.to_thread(run_query):
+                grouped[doc["parent_id"]].append(doc)
+            return grouped
+        except Exception as e:
+            logger.error(f"Failed to get vectors by parent_id: {str(e)}")
+            return grouped
+
     async def delete_vectors(
         self,
         chunk_ids: Optional[List[str]] = None,
@@ -187,20 +490,17 @@ class ArangoDB:
     ) -> bool:
         """Delete vectors by chunk IDs or parent ID."""
         try:
-            collection = self.db.collection("vectors")
-            
             if chunk_ids:
-                for chunk_id in chunk_ids:
-                    collection.delete(chunk_id)
+                # One request for all chunks
+                await asyncio.to_thread(self._vectors.delete_many, chunk_ids)
                 logger.debug(f"Deleted vectors with chunk_ids: {chunk_ids}")
             
             if parent_id:
-                aql = """
-                FOR doc IN vectors
-                FILTER doc.parent_id == @parent_id
-                REMOVE doc IN vectors
-                """
-                self.db.aql.execute(aql, bind_vars={"parent_id": parent_id})
+                await asyncio.to_thread(
+                    self.db.aql.execute,
+                    _DELETE_BY_PARENT_AQL,
+                    bind_vars={"parent_id": parent_id}
+                )
                 logger.debug(f"Deleted vectors with parent_id: {parent_id}")
             
             return True
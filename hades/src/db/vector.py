@@ -1,16 +1,57 @@
 """Vector search service using ArangoDB's FAISS integration."""
 
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple, Union
+import asyncio
+import numpy as np
 from loguru import logger
-from prometheus_client import Summary, Counter
+from prometheus_client import Histogram
 
 from .arango import ArangoDB
 from core.config import settings
+from core.monitoring import REGISTRY
 
 # Metrics
-VECTOR_INSERT_TIME = Summary('vector_insert_seconds', 'Time spent inserting vectors')
-VECTOR_SEARCH_TIME = Summary('vector_search_seconds', 'Time spent searching vectors')
-VECTOR_OPS = Counter('vector_operations_total', 'Total vector operations', ['operation'])
+# One histogram covers both duration and count (its _count series) of each
+# operation; the label takes four values: insert, search, delete, update_metadata
+VECTOR_OP_TIME = Histogram(
+    'vector_operation_seconds',
+    'Time spent on vector operations',
+    ['operation'],
+    registry=REGISTRY
+)
+
+class ContextFilter(NamedTuple):
+    """Context-derived conditions on vector metadata; None disables a condition."""
+    min_relevance: Optional[float] = None
+    semantic_types: Optional[List[str]] = None
+    related_to: Optional[List[str]] = None
+
+# Search queries are prebuilt for every combination of ContextFilter
+# conditions and the metadata filter, indexed by a bitmask of the conditions
+# in use, so the server sees a fixed set of query strings
+_RELEVANCE, _SEMANTIC, _RELATED, _METADATA = 1, 2, 4, 8
+
+def _build_search_query(mask: int) -> str:
+    aql = """
+    FOR doc IN VECTOR_NEAREST(
+        @collection,
+        @vector,
+        @k,
+        "vector"
+    )
+    """
+    if mask & _RELEVANCE:
+        aql += " FILTER doc.metadata.relevance_score >= @min_relevance"
+    if mask & _SEMANTIC:
+        aql += " FILTER doc.metadata.semantic_type IN @semantic_types"
+    if mask & _RELATED:
+        aql += " FILTER doc.metadata.related_to ANY IN @related_to"
+    if mask & _METADATA:
+        # Keys and values are both bound, never interpolated into the query
+        aql += " FILTER MATCHES(doc.metadata, @metadata_filter)"
+    return aql + " RETURN { key: doc._key, distance: doc.distance, metadata: doc.metadata }"
+
+_SEARCH_QUERIES = tuple(_build_search_query(mask) for mask in range(16))
 
 class VectorStore:
     """Vector storage and search using ArangoDB's vector capabilities."""
@@ -29,25 +70,27 @@ class VectorStore:
                 return True
                 
             # Ensure collection exists
-            if not self.db.db.has_collection(self._collection_name):
-                collection = self.db.db.create_collection(self._collection_name)
-                
-                # Create FAISS index
-                collection.add_persistent_index({
-                    "type": "inverted",
-                    "fields": ["vector"],
-                    "analyzer": "identity"
-                })
-                
-                # Create vector index using FAISS
-                collection.add_persistent_index({
-                    "type": "vector",
-                    "fields": ["vector"],
-                    "algorithm": "faiss",
-                    "dimension": settings.VECTOR_DIMENSION,
-                    "similarity": "euclidean"  # or "cosine" based on needs
-                })
-                
+            def create_collection() -> None:
+                if not self.db.db.has_collection(self._collection_name):
+                    collection = self.db.db.create_collection(self._collection_name)
+                    
+                    # Create FAISS index
+                    collection.add_persistent_index({
+                        "type": "inverted",
+                        "fields": ["vector"],
+                        "analyzer": "identity"
+                    })
+                    
+                    # Create vector index using FAISS
+                    collection.add_persistent_index({
+                        "type": "vector",
+                        "fields": ["vector"],
+                        "algorithm": "faiss",
+                        "dimension": settings.VECTOR_DIMENSION,
+                        "similarity": "euclidean"  # or "cosine" based on needs
+                    })
+                    
+            await asyncio.to_thread(create_collection)
             self._initialized = True
             logger.info("Vector store initialized successfully")
             return True
@@ -74,76 +117,122 @@ class VectorStore:
             bool: Success status
         """
         try:
-            with VECTOR_INSERT_TIME.time():
+            with VECTOR_OP_TIME.labels(operation="insert").time():
                 collection = self.db.db.collection(self._collection_name)
                 
                 doc = {
                     "_key": key,
-                    "vector": vector,
+                    "vector": np.asarray(vector, dtype=np.float32),
                     "metadata": metadata or {}
                 }
                 
-                collection.insert(doc, overwrite=True)
-                VECTOR_OPS.labels(operation="insert").inc()
+                await asyncio.to_thread(collection.insert, doc, overwrite=True)
                 return True
                 
         except Exception as e:
             logger.error(f"Failed to store vector: {str(e)}")
             return False
             
+    async def store_vectors(
+        self,
+        items: List[Tuple[str, List[float], Optional[Dict[str, Any]]]]
+    ) -> int:
+        """
+        Store several vectors with a single bulk import.
+        
+        Args:
+            items: (key, vector, metadata) tuples
+            
+        Returns:
+            int: Number of vectors stored
+        """
+        try:
+            with VECTOR_OP_TIME.labels(operation="insert").time():
+                collection = self.db.db.collection(self._collection_name)
+                
+                docs = [
+                    {
+                        "_key": key,
+                        "vector": np.asarray(vector, dtype=np.float32),
+                        "metadata": metadata or {}
+                    }
+                    for key, vector, metadata in items
+                ]
+                
+                result = await asyncio.to_thread(
+                    collection.import_bulk,
+                    docs,
+                    on_duplicate="replace",
+                    halt_on_error=False
+                )
+                if result["errors"]:
+                    logger.error(f"Failed to store {result['errors']} of {len(docs)} vectors")
+                stored = result["created"] + result["updated"]
+                return stored
+                
+        except Exception as e:
+            logger.error(f"Failed to store vectors: {str(e)}")
+            return 0
+            
     async def search(
         self,
-        query_vector: List[float],
+        query_vector: Union[List[float], np.ndarray],
         k: int = 10,
-        metadata_filter: Optional[Dict[str, Any]] = None
+        metadata_filter: Optional[Dict[str, Any]] = None,
+        context_filter: Optional[ContextFilter] = None
     ) -> List[Tuple[str, float, Dict[str, Any]]]:
         """
         Search for similar vectors.
         
         Args:
-            query_vector: Query vector
+            query_vector: Query vector, as a list or float32 array
             k: Number of results to return
-            metadata_filter: Optional filter for metadata fields
+            metadata_filter: Optional equality filter for metadata fields
+            context_filter: Optional context-derived metadata conditions
             
         Returns:
             List of tuples (key, distance, metadata)
         """
         try:
-            with VECTOR_SEARCH_TIME.time():
-                collection = self.db.db.collection(self._collection_name)
-                
-                # Build AQL query
-                aql = """
-                FOR doc IN VECTOR_NEAREST(
-                    @collection,
-                    @vector,
-                    @k,
-                    "vector"
-                )
-                """
-                
-                # Add metadata filter if provided
-                if metadata_filter:
-                    filter_conditions = []
-                    for key, value in metadata_filter.items():
-                        filter_conditions.append(f'doc.metadata.{key} == @{key}')
-                    if filter_conditions:
-                        aql += f" FILTER {' AND '.join(filter_conditions)}"
-                
-                aql += " RETURN { key: doc._key, distance: doc.distance, metadata: doc.metadata }"
-                
-                # Execute query
+            with VECTOR_OP_TIME.labels(operation="search").time():
                 bind_vars = {
                     "collection": self._collection_name,
-                    "vector": query_vector,
-                    "k": k,
-                    **(metadata_filter or {})
+                    # Serialized straight from the array by the driver's orjson
+                    # serializer, without building a list of Python floats
+                    "vector": np.asarray(query_vector, dtype=np.float32),
+                    "k": k
                 }
                 
-                cursor = self.db.db.aql.execute(aql, bind_vars=bind_vars)
-                results = [(doc["key"], doc["distance"], doc["metadata"]) for doc in cursor]
+                # Pick the prebuilt query for the active context conditions
+                mask = 0
+                if context_filter is not None:
+                    if context_filter.min_relevance is not None:
+                        mask |= _RELEVANCE
+                        bind_vars["min_relevance"] = context_filter.min_relevance
+                    if context_filter.semantic_types is not None:
+                        mask |= _SEMANTIC
+                        bind_vars["semantic_types"] = context_filter.semantic_types
+                    if context_filter.related_to is not None:
+                        mask |= _RELATED
+                        bind_vars["related_to"] = context_filter.related_to
+                if metadata_filter:
+                    mask |= _METADATA
+                    bind_vars["metadata_filter"] = metadata_filter
+                aql = _SEARCH_QUERIES[mask]
+                
+                # Execute query off the event loop; all k results arrive with
+                # the first response
+                def run_query() -> List[Tuple[str, float, Dict[str, Any]]]:
+                    cursor = self.db.db.aql.execute(
+                        aql,
+                        bind_vars=bind_vars,
+                        batch_size=max(k, 1),
+                        count=False
+                    )
+                    return [(doc["key"], doc["distance"], doc["metadata"]) for doc in cursor]
+                
+                results = await asyncio.to_thread(run_query)
                 
-                VECTOR_OPS.labels(operation="search").inc()
                 return results
                 
         except Exception as e:
@@ -153,9 +242,9 @@ class VectorStore:
     async def delete(self, key: str) -> bool:
         """Delete a vector by key."""
         try:
-            collection = self.db.db.collection(self._collection_name)
-            collection.delete(key)
-            VECTOR_OPS.labels(operation="delete").inc()
+            with VECTOR_OP_TIME.labels(operation="delete").time():
+                collection = self.db.db.collection(self._collection_name)
+                await asyncio.to_thread(collection.delete, key)
             return True
         except Exception as e:
             logger.error(f"Failed to delete vector: {str(e)}")
@@ -168,9 +257,11 @@ class VectorStore:
     ) -> bool:
         """Update metadata for a vector."""
         try:
-            collection = self.db.db.collection(self._collection_name)
-            collection.update({"_key": key}, {"metadata": metadata})
-            VECTOR_OPS.labels(operation="update_metadata").inc()
+            with VECTOR_OP_TIME.labels(operation="update_metadata").time():
+                collection = self.db.db.collection(self._collection_name)
+                await asyncio.to_thread(
+                    collection.update, {"_key": key}, {"metadata": metadata}
+                )
             return True
         except Exception as e:
             logger.error(f"Failed to update vector metadata: {str(e)}")
@@ -1,15 +1,44 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from loguru import logger
 import uvicorn
 
 from api.router import router as api_router
 from core.config import settings
-from core.monitoring import init_monitoring
+from core.logging import setup_logging
+from db.arango import ArangoDB
+from db import close_arango_client
+from core.monitoring import init_monitoring, start_monitoring, shutdown_monitoring
+from memory_management.manager import MemoryManager
+
+setup_logging()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("Starting HADES API server...")
+    # Share one ArangoDB connection and memory manager across all request handlers
+    app.state.db = ArangoDB()
+    await app.state.db.connect()
+    app.state.memory_manager = MemoryManager(app.state.db)
+    start_monitoring()
+    
+    yield
+    
+    logger.info("Shutting down HADES API server...")
+    rag_chain = getattr(app.state, "rag_chain", None)
+    if rag_chain is not None:
+        await rag_chain.retriever.close()
+    await app.state.db.close()
+    close_arango_client()
+    shutdown_monitoring()
+    # Drain records still queued for the file sinks
+    await logger.complete()
 
 app = FastAPI(
     title="HADES API",
     description="Hierarchical Adaptive Data Extraction System",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Initialize monitoring
@@ -17,13 +46,13 @@ init_monitoring(app)
 
 app.include_router(api_router, prefix="/api")
 
-@app.on_event("startup")
-async def startup_event():
-    logger.info("Starting HADES API server...")
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    logger.info("Shutting down HADES API server...")
-
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=settings.API_RELOAD,
+        workers=settings.API_WORKERS,
+        loop="uvloop",
+        http="httptools"
+    )
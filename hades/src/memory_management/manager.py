@@ -63,7 +63,12 @@ class MemoryManager:
             success = await self.store(
                 key,
                 value,
-                metadata=analysis.metadata,
+                metadata=ContextMetadata(
+                    tokens=analysis.metadata.tokens,
+                    semantics=analysis.metadata.semantics,
+                    last_access=analysis.metadata.last_access,
+                    access_count=analysis.metadata.access_count
+                ),
                 tier=analysis.suggested_tier
             )
             
@@ -107,11 +112,12 @@ class MemoryManager:
         Retrieve data from memory tiers.
         Returns tuple of (value, tier_found_in)
         """
-        # Check tiers in order of access speed
-        if value := await self.elysium.retrieve(key):
+        # Check tiers in order of access speed. The in-memory tiers are plain
+        # dict lookups, so only Lethe needs an await.
+        if value := self.elysium.peek(key):
             return value, "elysium"
             
-        if value := await self.asphodel.retrieve(key):
+        if value := self.asphodel.peek(key):
             # Consider promoting to Elysium
             metadata = await self.asphodel.get_metadata(key)
             if metadata and metadata.access_count > 5:
@@ -119,7 +125,7 @@ class MemoryManager:
                 await self.asphodel.evict(key)
             return value, "asphodel"
             
-        if value := await self.tartarus.retrieve(key):
+        if value := self.tartarus.peek(key):
             # Consider promoting to Asphodel
             metadata = await self.tartarus.get_metadata(key)
             if metadata:
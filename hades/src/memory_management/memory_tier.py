@@ -1,10 +1,13 @@
 from typing import Any, Dict, Optional, List
 from abc import ABC, abstractmethod
-import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
 from loguru import logger
-from pydantic import BaseModel
 
-class ContextMetadata(BaseModel):
+# A slotted dataclass rather than a Pydantic model: one is built on every tier
+# store and promotion, and the values always come from analyze_context.
+@dataclass(slots=True)
+class ContextMetadata:
     """Metadata for context-aware memory management."""
     tokens: List[str]
     semantics: Dict[str, float]
@@ -17,7 +20,6 @@ class MemoryTier(ABC):
         self.current_size = 0
         self._data: Dict[str, Any] = {}
         self._metadata: Dict[str, ContextMetadata] = {}
-        self._lock = asyncio.Lock()
     
     @abstractmethod
     async def store(self, key: str, value: Any, metadata: Optional[ContextMetadata] = None) -> bool:
@@ -37,30 +39,41 @@ class MemoryTier(ABC):
     async def get_metadata(self, key: str) -> Optional[ContextMetadata]:
         """Get metadata for stored item."""
         return self._metadata.get(key)
+    
+    def peek(self, key: str) -> Optional[Any]:
+        """Look up data in an in-memory tier without going through the event loop."""
+        return self._data.get(key)
+    
+    # Tier updates need no lock: they never await, so no other coroutine on
+    # the event loop can run in the middle of one.
+    
+    def _insert(self, key: str, value: Any, metadata: Optional[ContextMetadata]) -> None:
+        if metadata:
+            self._metadata[key] = metadata
+        self._data[key] = value
+    
+    def _remove(self, key: str) -> bool:
+        if key not in self._data:
+            return False
+        del self._data[key]
+        self._metadata.pop(key, None)
+        return True
 
 class ElysiumTier(MemoryTier):
     """Hot memory tier for active context."""
     
     async def store(self, key: str, value: Any, metadata: Optional[ContextMetadata] = None) -> bool:
-        async with self._lock:
-            if self.current_size >= self.max_size:
-                logger.warning("Elysium tier at capacity")
-                return False
-            self._data[key] = value
-            if metadata:
-                self._metadata[key] = metadata
-            return True
+        if self.current_size >= self.max_size:
+            logger.warning("Elysium tier at capacity")
+            return False
+        self._insert(key, value, metadata)
+        return True
     
     async def retrieve(self, key: str) -> Optional[Any]:
-        return self._data.get(key)
+        return self.peek(key)
     
     async def evict(self, key: str) -> bool:
-        async with self._lock:
-            if key in self._data:
-                del self._data[key]
-                self._metadata.pop(key, None)
-                return True
-            return False
+        return self._remove(key)
 
 class AsphodelTier(MemoryTier):
     """Warm memory tier for recent data."""
@@ -68,53 +81,44 @@ class AsphodelTier(MemoryTier):
     def __init__(self, max_size: int, window_size: int):
         super().__init__(max_size)
         self.window_size = window_size
+        # Kept in access order, least recently used first
+        self._data: OrderedDict[str, Any] = OrderedDict()
     
     async def store(self, key: str, value: Any, metadata: Optional[ContextMetadata] = None) -> bool:
-        async with self._lock:
-            if len(self._data) >= self.window_size:
-                # Evict oldest item if at window capacity
-                oldest_key = min(
-                    self._metadata.keys(),
-                    key=lambda k: self._metadata[k].last_access
-                )
-                await self.evict(oldest_key)
-            
-            self._data[key] = value
-            if metadata:
-                self._metadata[key] = metadata
-            return True
+        # Re-inserting moves an existing key to the most recent end
+        self._data.pop(key, None)
+        if len(self._data) >= self.window_size:
+            # Evict least recently used item if at window capacity
+            oldest_key, _ = self._data.popitem(last=False)
+            self._metadata.pop(oldest_key, None)
+        
+        self._insert(key, value, metadata)
+        return True
+    
+    def peek(self, key: str) -> Optional[Any]:
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
     
     async def retrieve(self, key: str) -> Optional[Any]:
-        return self._data.get(key)
+        return self.peek(key)
     
     async def evict(self, key: str) -> bool:
-        async with self._lock:
-            if key in self._data:
-                del self._data[key]
-                self._metadata.pop(key, None)
-                return True
-            return False
+        return self._remove(key)
 
 class TartarusTier(MemoryTier):
     """Archival tier for potentially relevant but inactive data."""
     
     async def store(self, key: str, value: Any, metadata: Optional[ContextMetadata] = None) -> bool:
-        async with self._lock:
-            self._data[key] = value
-            if metadata:
-                self._metadata[key] = metadata
-            return True
+        self._insert(key, value, metadata)
+        return True
     
     async def retrieve(self, key: str) -> Optional[Any]:
-        return self._data.get(key)
+        return self.peek(key)
     
     async def evict(self, key: str) -> bool:
-        async with self._lock:
-            if key in self._data:
-                del self._data[key]
-                self._metadata.pop(key, None)
-                return True
-            return False
+        return self._remove(key)
 
 class LetheTier(MemoryTier):
     """Cold storage tier with database backend."""
@@ -125,7 +129,7 @@ class LetheTier(MemoryTier):
     
     async def store(self, key: str, value: Any, metadata: Optional[ContextMetadata] = None) -> bool:
         try:
-            await self.db.store(key, value, metadata.dict() if metadata else None)
+            await self.db.store_buffered(key, value, asdict(metadata) if metadata else None)
             return True
         except Exception as e:
             logger.error(f"Error storing in Lethe: {str(e)}")
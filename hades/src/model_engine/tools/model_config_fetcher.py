@@ -4,16 +4,37 @@ Model Config Fetcher - Fetches the config.json for a specified model from Huggin
 """
 
 import os
+import asyncio
+import importlib.util
 import yaml
 import json
+from functools import lru_cache
 from pathlib import Path
+from typing import List
+
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as YamlLoader
+
+# Use the multi-threaded hf_transfer downloader when it is installed. This has
+# to happen before huggingface_hub is imported, and only if the package is
+# present: huggingface_hub refuses to download with the flag set but no package.
+if importlib.util.find_spec("hf_transfer") is not None:
+    os.environ.setdefault("HF_HUB_ENABLE_HF_TRANSFER", "1")
+
 from huggingface_hub import hf_hub_download, login
 
 
 def load_config(config_path: str = "model_search_config.yaml") -> dict:
-    """Load configuration from YAML file."""
+    """Load configuration from YAML file, parsing it again only after it changes."""
+    return _load_config_file(config_path, os.stat(config_path).st_mtime_ns)
+
+
+@lru_cache(maxsize=8)
+def _load_config_file(config_path: str, mtime_ns: int) -> dict:
     with open(config_path, 'r') as file:
-        return yaml.safe_load(file)
+        return yaml.load(file, Loader=YamlLoader)
 
 
 def authenticate_hf():
@@ -59,6 +80,28 @@ def fetch_model_config(model_id: str, output_dir: str = "model_configs") -> str:
         raise Exception(f"Error downloading config.json: {str(e)}")
 
 
+async def fetch_model_configs(model_ids: List[str], output_dir: str = "model_configs") -> List[str]:
+    """
+    Fetch config.json for several models concurrently.
+    
+    Args:
+        model_ids: The HuggingFace model IDs
+        output_dir: Directory to save the config files under, one subdirectory per model
+        
+    Returns:
+        Paths to the downloaded config files, in the order of model_ids
+    """
+    # Each model gets its own directory, since every file is named config.json
+    return list(await asyncio.gather(*(
+        asyncio.to_thread(
+            fetch_model_config,
+            model_id,
+            str(Path(output_dir) / model_id.replace('/', '_'))
+        )
+        for model_id in model_ids
+    )))
+
+
 def display_model_info(config_json: dict):
     """Display relevant model configuration information."""
     important_fields = [
@@ -1,7 +1,8 @@
 from prometheus_client import Gauge, Counter, start_http_server
-from typing import Dict, Any
-import json
+from typing import Dict, Any, Optional
 from pathlib import Path
+import mmap
+import orjson
 import time
 from loguru import logger
 
@@ -47,32 +48,55 @@ class HADESMetricsExporter:
         logger.info(f"Started HADES metrics server on port {self.metrics_port}")
         
     def update_metrics(self, metrics_file: Path):
-        """Update metrics from the JSON log file."""
+        """Update metrics from the latest record in the JSON log file."""
         try:
-            if not metrics_file.exists():
+            if not metrics_file.exists() or metrics_file.stat().st_size == 0:
                 return
                 
-            with open(metrics_file, 'r') as f:
-                for line in f:
-                    try:
-                        data = json.loads(line)
-                        memory_stats = data.get('memory_stats', {})
-                        metrics = data.get('metrics', {})
-                        
-                        # Update memory metrics
-                        self.elysium_size.set(memory_stats.get('elysium_size', 0))
-                        self.asphodel_size.set(memory_stats.get('asphodel_size', 0))
-                        self.lethe_size.set(memory_stats.get('lethe_size', 0))
-                        
-                        # Update utilization
-                        self.memory_utilization.set(metrics.get('memory_utilization', 0))
-                        
-                    except json.JSONDecodeError:
-                        continue
+            with open(metrics_file, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    data = self._last_record(mm)
+                    
+            if data is None:
+                return
+                
+            memory_stats = data.get('memory_stats', {})
+            metrics = data.get('metrics', {})
+            
+            # Update memory metrics
+            self.elysium_size.set(memory_stats.get('elysium_size', 0))
+            self.asphodel_size.set(memory_stats.get('asphodel_size', 0))
+            self.lethe_size.set(memory_stats.get('lethe_size', 0))
+            
+            # Update utilization
+            self.memory_utilization.set(metrics.get('memory_utilization', 0))
                         
         except Exception as e:
             logger.error(f"Error updating metrics: {str(e)}")
             
+    @staticmethod
+    def _last_record(mm: mmap.mmap) -> Optional[Dict[str, Any]]:
+        """
+        Return the last parseable record of a mapped JSON-lines file.
+        
+        Only the newest record determines the gauge values, so the file is
+        scanned backwards from the end of the mapping instead of decoding
+        every line.
+        """
+        end = len(mm)
+        while end > 0:
+            start = mm.rfind(b'\n', 0, end) + 1
+            line = mm[start:end]
+            end = start - 1
+            if not line.strip():
+                continue
+            try:
+                return orjson.loads(line)
+            except orjson.JSONDecodeError:
+                # Skip a partially written trailing record
+                continue
+        return None
+            
     def record_operation(self, operation: str, tier: str, duration: float):
         """Record an operation and its duration."""
         self.operations_total.labels(operation=operation, tier=tier).inc()
@@ -19,6 +19,7 @@ MODEL_CONFIGS = {
     "deepseek-r1-distill": {
         "name": "deepseek-ai/DeepSeek-R1-Distill-Qwen-7B",
         "max_length": 2048,
+        "max_new_tokens": 512,
         "temperature": 0.7,
         "top_p": 0.95,
         "repetition_penalty": 1.15,
@@ -27,6 +28,7 @@ MODEL_CONFIGS = {
     "llama2-7b": {
         "name": "meta-llama/Llama-2-7b-chat-hf",
         "max_length": 2000,
+        "max_new_tokens": 512,
         "temperature": 0.7,
         "top_p": 0.95,
         "repetition_penalty": 1.15,
@@ -78,6 +80,8 @@ class RAGChain:
         
         config = MODEL_CONFIGS[model_key]
         self.max_length = config["max_length"]
+        # Tokens kept free for the answer; max_length covers prompt and answer
+        self.max_new_tokens = config["max_new_tokens"]
         
         # Initialize model and tokenizer
         try:
@@ -99,6 +103,9 @@ class RAGChain:
                 cache_dir=".cache/huggingface"
             )
             
+            # Context budgets are in model tokens, so measure context in tokens
+            self.retriever.length_function = self._count_tokens
+            
             self.model = AutoModelForCausalLM.from_pretrained(
                 config["name"],
                 cache_dir=".cache/huggingface",
@@ -131,6 +138,15 @@ class RAGChain:
             logger.error(f"Failed to initialize RAG chain: {str(e)}")
             raise
             
+    def _count_tokens(self, text: str) -> int:
+        """Count model tokens in text."""
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+        
+    def _context_budget(self, prompt: PromptTemplate, **inputs: str) -> int:
+        """Tokens left for context once the prompt and answer are accounted for."""
+        overhead = self._count_tokens(prompt.format(context="", **inputs))
+        return self.max_length - self.max_new_tokens - overhead
+        
     def _format_sources(self, sources: List[str]) -> str:
         """Format sources for response."""
         if not sources:
@@ -141,14 +157,22 @@ class RAGChain:
     async def _get_context(
         self,
         query: str,
+        max_length: int,
         metadata_filter: Optional[Dict] = None
     ) -> Dict:
-        """Get relevant context for query."""
+        """Get relevant context for query within max_length tokens."""
         try:
+            if max_length <= 0:
+                logger.warning("Prompt leaves no room for context")
+                return {
+                    "context": "",
+                    "sources": [],
+                    "relevance_scores": []
+                }
             return await self.retriever.get_relevant_context(
                 query=query,
                 metadata_filter=metadata_filter,
-                max_length=self.max_length
+                max_length=max_length
             )
         except Exception as e:
             logger.error(f"Failed to get context: {str(e)}")
@@ -169,6 +193,7 @@ class RAGChain:
             # Get relevant context
             context_data = await self._get_context(
                 query,
+                self._context_budget(self.prompt, question=query),
                 metadata_filter
             )
             
@@ -251,6 +276,11 @@ class RAGChain:
             # Get context
             context_data = await self._get_context(
                 query,
+                self._context_budget(
+                    history_prompt,
+                    question=query,
+                    history=history_text
+                ),
                 metadata_filter
             )
             
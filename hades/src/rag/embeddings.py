@@ -0,0 +1,34 @@
+"""Shared embedding model for the RAG pipeline."""
+from functools import lru_cache
+
+import torch
+from loguru import logger
+
+from langchain.embeddings import HuggingFaceEmbeddings
+
+@lru_cache(maxsize=None)
+def get_embeddings(model_name: str) -> HuggingFaceEmbeddings:
+    """Load the embedding model once per process.
+    
+    The retriever and the document processor share the returned instance, so
+    queries and documents are embedded by the same weights held in memory once.
+    On GPU the model runs in half precision.
+    
+    Args:
+        model_name: HuggingFace model name for embeddings
+    """
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    embeddings = HuggingFaceEmbeddings(
+        model_name=model_name,
+        cache_folder=".cache/huggingface",
+        model_kwargs={"device": device},
+        encode_kwargs={"batch_size": 64}
+    )
+    if device == "cuda":
+        embeddings.client.half()
+        
+    # Pay lazy initialization (CUDA context, kernel selection) here rather
+    # than on the first request
+    embeddings.embed_query("warmup")
+    logger.info(f"Loaded embedding model {model_name} on {device}")
+    return embeddings
@@ -1,15 +1,16 @@
 """Document processor for RAG pipeline."""
 from typing import Dict, List, Optional, Tuple
+import asyncio
 from datetime import datetime
 import hashlib
 import uuid
 from loguru import logger
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.embeddings import HuggingFaceEmbeddings
 from langchain.docstore.document import Document
 
 from db.arango import ArangoDB
+from .embeddings import get_embeddings
 
 class DocumentProcessor:
     """Process documents for RAG pipeline."""
@@ -19,7 +20,8 @@ class DocumentProcessor:
         db: ArangoDB,
         embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
         chunk_size: int = 500,
-        chunk_overlap: int = 50
+        chunk_overlap: int = 50,
+        batch_size: int = 64
     ):
         """Initialize document processor.
         
@@ -28,8 +30,10 @@ class DocumentProcessor:
             embedding_model: HuggingFace model name for embeddings
             chunk_size: Size of text chunks
             chunk_overlap: Overlap between chunks
+            batch_size: Number of chunks embedded and stored together
         """
         self.db = db
+        self.batch_size = batch_size
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
@@ -37,10 +41,7 @@ class DocumentProcessor:
             add_start_index=True,
         )
         
-        self.embedding_model = HuggingFaceEmbeddings(
-            model_name=embedding_model,
-            cache_folder=".cache/huggingface"
-        )
+        self.embedding_model = get_embeddings(embedding_model)
         
     def _generate_chunk_id(self, text: str, parent_id: str) -> str:
         """Generate unique ID for text chunk."""
@@ -91,8 +92,9 @@ class DocumentProcessor:
     ) -> List[Tuple[Document, List[float]]]:
         """Generate embeddings for text chunks."""
         try:
-            # Generate embeddings in batches
-            embeddings = self.embedding_model.embed_documents(
+            # Generate embeddings in batches, off the event loop
+            embeddings = await asyncio.to_thread(
+                self.embedding_model.embed_documents,
                 [chunk.page_content for chunk in chunks]
             )
             
@@ -106,6 +108,25 @@ class DocumentProcessor:
             logger.error(f"Failed to generate embeddings: {str(e)}")
             return []
             
+    async def _store_chunks(
+        self,
+        chunk_embeddings: List[Tuple[Document, List[float]]],
+        parent_id: str
+    ) -> int:
+        """Store chunks with their embeddings in bulk."""
+        return await self.db.store_vectors(
+            [
+                (
+                    chunk.page_content,
+                    embedding,
+                    chunk.metadata,
+                    self._generate_chunk_id(chunk.page_content, parent_id)
+                )
+                for chunk, embedding in chunk_embeddings
+            ],
+            parent_id=parent_id
+        )
+            
     async def process_document(
         self,
         text: str,
@@ -129,29 +150,38 @@ class DocumentProcessor:
             if not chunks:
                 raise ValueError("No chunks generated from text")
                 
-            # Generate embeddings
-            chunk_embeddings = await self.generate_embeddings(chunks)
-            if not chunk_embeddings:
-                raise ValueError("Failed to generate embeddings")
-                
-            # Store chunks with embeddings
-            for chunk, embedding in chunk_embeddings:
-                chunk_id = self._generate_chunk_id(
-                    chunk.page_content,
-                    parent_id
-                )
-                
-                # Store in vector collection
-                success = await self.db.store_vector(
-                    text=chunk.page_content,
-                    embedding=embedding,
-                    metadata=chunk.metadata,
-                    chunk_id=chunk_id,
-                    parent_id=parent_id
+            # Embed and store batch by batch; each batch is written while
+            # the next one is embedded
+            stored = 0
+            store_task = None
+            try:
+                for start in range(0, len(chunks), self.batch_size):
+                    chunk_embeddings = await self.generate_embeddings(
+                        chunks[start:start + self.batch_size]
+                    )
+                    if not chunk_embeddings:
+                        raise ValueError("Failed to generate embeddings")
+                        
+                    if store_task is not None:
+                        stored += await store_task
+                    store_task = asyncio.create_task(
+                        self._store_chunks(chunk_embeddings, parent_id)
+                    )
+                stored += await store_task
+            except Exception:
+                # Earlier batches are already written. Let the pending write
+                # finish (its import runs in a worker thread that cancelling
+                # would not stop), then remove the partial document
+                if store_task is not None:
+                    await asyncio.gather(store_task, return_exceptions=True)
+                await self.db.delete_vectors(parent_id=parent_id)
+                raise
+            
+            if stored < len(chunks):
+                logger.warning(
+                    f"Failed to store {len(chunks) - stored} chunks "
+                    f"of parent_id: {parent_id}"
                 )
-                
-                if not success:
-                    logger.warning(f"Failed to store chunk {chunk_id}")
                     
             logger.info(
                 f"Processed document: {len(chunks)} chunks, "
@@ -1,12 +1,17 @@
 """Retrieval mechanism for RAG pipeline."""
-from typing import Dict, List, Optional, Union
+import asyncio
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple, Union
 import numpy as np
 from loguru import logger
 
-from langchain.embeddings import HuggingFaceEmbeddings
 from langchain.docstore.document import Document
 
 from db.arango import ArangoDB
+from .embeddings import get_embeddings
+
+# Number of query embeddings kept per retriever
+_QUERY_CACHE_SIZE = 1024
 
 class Retriever:
     """Handle document retrieval and context building."""
@@ -15,46 +20,62 @@ class Retriever:
         self,
         db: ArangoDB,
         embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
-        max_context_length: int = 2000
+        max_context_length: int = 2000,
+        batch_size: int = 32,
+        flush_interval: float = 0.01,
+        length_function: Callable[[str], int] = len
     ):
         """Initialize retriever.
         
         Args:
             db: ArangoDB instance
             embedding_model: HuggingFace model name for embeddings
-            max_context_length: Maximum length of combined context
+            max_context_length: Maximum length of combined context, as
+                measured by length_function
+            batch_size: Maximum number of queries embedded together
+            flush_interval: Seconds to wait for more queries before embedding a batch
+            length_function: Measures the length of a text against the context
+                budget; characters by default
         """
         self.db = db
         self.max_context_length = max_context_length
-        self.embedding_model = HuggingFaceEmbeddings(
-            model_name=embedding_model,
-            cache_folder=".cache/huggingface"
-        )
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.length_function = length_function
+        self.embedding_model = get_embeddings(embedding_model)
+        # Queries are embedded in batches with embed_documents, which matches
+        # embed_query only for symmetric models that add no query instruction
+        if getattr(self.embedding_model, "query_instruction", None):
+            raise ValueError(
+                f"{embedding_model} embeds queries with an instruction; "
+                "the retriever supports symmetric embedding models only"
+            )
+        # LRU of query embeddings, so repeated queries skip the forward pass
+        self._query_cache: OrderedDict[str, List[float]] = OrderedDict()
+        # Queries awaiting embedding, drained in batches by a background task
+        self._embed_queue: Optional[asyncio.Queue] = None
+        self._embed_worker: Optional[asyncio.Task] = None
         
-    def _calculate_relevance_score(self, distance: float) -> float:
-        """Calculate relevance score from distance.
+    @staticmethod
+    def _score_array(results: List[Dict]) -> np.ndarray:
+        """Calculate relevance scores from result distances.
         
-        Convert distance to similarity score (0-1 range).
+        Convert distances to similarity scores (0-1 range).
         Lower distance means higher similarity.
         """
         # Assuming cosine distance, convert to similarity
-        return 1 - min(1.0, max(0.0, distance))
-        
-    def _filter_by_relevance(
-        self,
-        results: List[Dict],
-        threshold: float = 0.7
-    ) -> List[Dict]:
-        """Filter results by relevance score."""
-        filtered = [
-            r for r in results
-            if self._calculate_relevance_score(r["distance"]) >= threshold
-        ]
-        logger.debug(
-            f"Filtered {len(results)} results to {len(filtered)} "
-            f"using threshold {threshold}"
+        distances = np.fromiter(
+            (r["distance"] for r in results),
+            dtype=np.float64,
+            count=len(results)
         )
-        return filtered
+        return 1.0 - np.clip(distances, 0.0, 1.0)
+        
+    def _score_results(self, results: List[Dict]) -> List[Dict]:
+        """Stash each result's relevance score on it as "_score"."""
+        for result, score in zip(results, self._score_array(results).tolist()):
+            result["_score"] = score
+        return results
         
     def _build_context_window(
         self,
@@ -63,41 +84,117 @@ class Retriever:
     ) -> str:
         """Build context window from results."""
         max_len = max_length or self.max_context_length
-        context_parts = []
-        current_length = 0
+        if not results:
+            return ""
         
         # Sort by relevance score
-        sorted_results = sorted(
-            results,
-            key=lambda x: self._calculate_relevance_score(x["distance"]),
-            reverse=True
+        scores = np.fromiter(
+            (r["_score"] for r in results),
+            dtype=np.float64,
+            count=len(results)
         )
+        order = np.argsort(-scores, kind="stable")
         
-        for result in sorted_results:
-            text = result["text"]
-            text_len = len(text)
-            
-            # Check if adding this text would exceed max length
-            if current_length + text_len > max_len:
-                # If this is the first text, include a truncated version
-                if not context_parts:
-                    truncated = text[:max_len]
-                    context_parts.append(truncated)
-                break
-                
-            context_parts.append(text)
-            current_length += text_len
+        # Take the most relevant texts whose combined length, separators
+        # included, fits the budget
+        separator = "\n\n"
+        separator_length = self.length_function(separator)
+        lengths = np.fromiter(
+            (self.length_function(results[i]["text"]) for i in order),
+            dtype=np.int64,
+            count=len(order)
+        )
+        totals = np.cumsum(lengths + separator_length) - separator_length
+        cut = int(np.searchsorted(totals, max_len, side="right"))
+        
+        # If even the first text is too long, include a truncated version
+        if cut == 0:
+            return self._truncate(results[order[0]]["text"], max_len)
             
-        return "\n\n".join(context_parts)
+        return separator.join(results[i]["text"] for i in order[:cut])
+        
+    def _truncate(self, text: str, max_len: int) -> str:
+        """Longest prefix of text within max_len, as measured by length_function."""
+        # Binary search over prefix lengths; length_function grows with the prefix
+        low, high = 0, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.length_function(text[:mid]) <= max_len:
+                low = mid
+            else:
+                high = mid - 1
+        return text[:low]
         
     async def generate_query_embedding(self, query: str) -> List[float]:
         """Generate embedding for query text."""
+        key = query.strip()
+        cached = self._query_cache.get(key)
+        if cached is not None:
+            self._query_cache.move_to_end(key)
+            return cached
+            
+        if self._embed_worker is None:
+            self._embed_queue = asyncio.Queue()
+            self._embed_worker = asyncio.create_task(self._drain_queries())
+            
+        future = asyncio.get_running_loop().create_future()
+        await self._embed_queue.put((key, future))
         try:
-            return self.embedding_model.embed_query(query)
+            embedding = await future
         except Exception as e:
             logger.error(f"Failed to generate query embedding: {str(e)}")
             raise
             
+        self._cache_query_embedding(key, embedding)
+        return embedding
+    
+    def _cache_query_embedding(self, key: str, embedding: List[float]) -> None:
+        """Add a query embedding to the LRU, evicting the least recently used."""
+        self._query_cache[key] = embedding
+        if len(self._query_cache) > _QUERY_CACHE_SIZE:
+            self._query_cache.popitem(last=False)
+    
+    async def _drain_queries(self) -> None:
+        """Embed queued queries in batches until cancelled."""
+        queue = self._embed_queue
+        while True:
+            batch: List[Tuple[str, asyncio.Future]] = [await queue.get()]
+            # Give concurrent requests a moment to join this batch
+            await asyncio.sleep(self.flush_interval)
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+                    
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                # Run the forward pass off the event loop
+                embeddings = await asyncio.to_thread(
+                    self.embedding_model.embed_documents, texts
+                )
+                by_text = dict(zip(texts, embeddings))
+                for text, future in batch:
+                    if not future.done():
+                        future.set_result(by_text[text])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            
+    async def close(self) -> None:
+        """Stop the query embedding worker, failing queries still queued."""
+        if self._embed_worker is None:
+            return
+        self._embed_worker.cancel()
+        await asyncio.gather(self._embed_worker, return_exceptions=True)
+        self._embed_worker = None
+        while not self._embed_queue.empty():
+            _, future = self._embed_queue.get_nowait()
+            if not future.done():
+                future.cancel()
+        self._embed_queue = None
+            
     async def similarity_search(
         self,
         query: Union[str, List[float]],
@@ -114,22 +211,74 @@ class Retriever:
                 else query
             )
             
-            # Search vector store
-            results = await self.db.search_vectors(
-                query_vector=query_vector,
-                k=k,
-                metadata_filter=metadata_filter
-            )
-            
-            # Filter by relevance
-            if threshold:
-                results = self._filter_by_relevance(results, threshold)
-                
-            return results
+            return await self._search(query_vector, k, threshold, metadata_filter)
             
         except Exception as e:
             logger.error(f"Failed to perform similarity search: {str(e)}")
             return []
+    
+    async def similarity_search_batch(
+        self,
+        queries: List[str],
+        k: int = 3,
+        threshold: float = 0.7,
+        metadata_filter: Optional[Dict] = None
+    ) -> List[List[Dict]]:
+        """Perform similarity search for several queries at once.
+        
+        Uncached queries are embedded in a single forward pass and the vector
+        searches run concurrently.
+        
+        Returns:
+            One result list per query, in query order
+        """
+        try:
+            keys = [query.strip() for query in queries]
+            by_key = {}
+            missing = []
+            for key in dict.fromkeys(keys):
+                cached = self._query_cache.get(key)
+                if cached is not None:
+                    self._query_cache.move_to_end(key)
+                    by_key[key] = cached
+                else:
+                    missing.append(key)
+                    
+            if missing:
+                # Run the forward pass off the event loop
+                embeddings = await asyncio.to_thread(
+                    self.embedding_model.embed_documents, missing
+                )
+                for key, embedding in zip(missing, embeddings):
+                    by_key[key] = embedding
+                    self._cache_query_embedding(key, embedding)
+                    
+            vectors = [by_key[key] for key in keys]
+            return list(await asyncio.gather(*(
+                self._search(vector, k, threshold, metadata_filter)
+                for vector in vectors
+            )))
+            
+        except Exception as e:
+            logger.error(f"Failed to perform batch similarity search: {str(e)}")
+            return [[] for _ in queries]
+    
+    async def _search(
+        self,
+        query_vector: List[float],
+        k: int,
+        threshold: float,
+        metadata_filter: Optional[Dict]
+    ) -> List[Dict]:
+        # Search vector store; the relevance threshold becomes a distance
+        # bound applied by the database
+        results = await self.db.search_vectors(
+            query_vector=query_vector,
+            k=k,
+            metadata_filter=metadata_filter,
+            max_distance=1.0 - threshold if threshold else None
+        )
+        return self._score_results(results)
             
     async def get_relevant_context(
         self,
@@ -163,16 +312,11 @@ class Retriever:
                 max_length=max_length
             )
             
-            # Extract sources and scores
-            sources = []
-            scores = []
-            for r in results:
-                source = r["metadata"].get("source", "unknown")
-                if source not in sources:
-                    sources.append(source)
-                scores.append(
-                    self._calculate_relevance_score(r["distance"])
-                )
+            # Extract sources (deduplicated, first-seen order) and scores
+            sources = list(dict.fromkeys(
+                r["metadata"].get("source", "unknown") for r in results
+            ))
+            scores = [r["_score"] for r in results]
                 
             return {
                 "context": context,
@@ -188,49 +332,57 @@ class Retriever:
                 "relevance_scores": []
             }
             
-    async def get_context_by_id(
+    def _document_context(
         self,
         parent_id: str,
+        chunks: List[Dict],
         max_length: Optional[int] = None
     ) -> Dict:
-        """Get context for a specific document."""
-        try:
-            # Search by parent ID
-            results = await self.db.search_vectors(
-                metadata_filter={"parent_id": parent_id}
-            )
-            
-            if not results:
-                logger.warning(f"No context found for parent_id: {parent_id}")
-                return {
-                    "context": "",
-                    "sources": [],
-                    "chunk_count": 0
-                }
-                
-            # Build context window
-            context = self._build_context_window(
-                results,
-                max_length=max_length
-            )
-            
-            # Extract sources
-            sources = []
-            for r in results:
-                source = r["metadata"].get("source", "unknown")
-                if source not in sources:
-                    sources.append(source)
-                    
-            return {
-                "context": context,
-                "sources": sources,
-                "chunk_count": len(results)
-            }
-            
-        except Exception as e:
-            logger.error(f"Failed to get context by ID: {str(e)}")
+        """Build the context entry for one document's chunks."""
+        if not chunks:
+            logger.warning(f"No context found for parent_id: {parent_id}")
             return {
                 "context": "",
                 "sources": [],
                 "chunk_count": 0
             }
+            
+        # Every chunk of the document is equally relevant; the stable sort in
+        # _build_context_window keeps them in stored order
+        for chunk in chunks:
+            chunk["_score"] = 1.0
+        context = self._build_context_window(chunks, max_length=max_length)
+        
+        # Extract sources (deduplicated, first-seen order)
+        sources = list(dict.fromkeys(
+            c["metadata"].get("source", "unknown") for c in chunks
+        ))
+                
+        return {
+            "context": context,
+            "sources": sources,
+            "chunk_count": len(chunks)
+        }
+        
+    async def get_context_by_id(
+        self,
+        parent_id: str,
+        max_length: Optional[int] = None
+    ) -> Dict:
+        """Get context for a specific document."""
+        return (await self.get_context_by_ids([parent_id], max_length))[0]
+            
+    async def get_context_by_ids(
+        self,
+        parent_ids: List[str],
+        max_length: Optional[int] = None
+    ) -> List[Dict]:
+        """Get context for several documents, one entry per parent ID.
+        
+        All documents' chunks are fetched with a single query.
+        """
+        chunks = await self.db.get_vectors_by_parent_ids(parent_ids)
+        return [
+            self._document_context(parent_id, chunks[parent_id], max_length)
+            for parent_id in parent_ids
+        ]
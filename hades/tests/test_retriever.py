@@ -0,0 +1,43 @@
+import pytest
+from src.rag import retriever as retriever_module
+from src.rag.retriever import Retriever
+
+@pytest.fixture
+def retriever(db, monkeypatch):
+    # Context lookups by ID never embed anything
+    monkeypatch.setattr(retriever_module, "get_embeddings", lambda model_name: None)
+    return Retriever(db)
+
+@pytest.mark.asyncio
+async def test_get_context_by_ids(db, retriever):
+    await db.store_vectors(
+        [
+            ("first chunk", [1.0, 0.0, 0.0, 0.0], {"source": "a.txt"}, "doc_a_0"),
+            ("second chunk", [0.0, 1.0, 0.0, 0.0], {"source": "a.txt"}, "doc_a_1")
+        ],
+        parent_id="doc_a"
+    )
+    await db.store_vectors(
+        [("only chunk", [0.0, 0.0, 1.0, 0.0], {"source": "b.txt"}, "doc_b_0")],
+        parent_id="doc_b"
+    )
+
+    try:
+        results = await retriever.get_context_by_ids(["doc_a", "doc_b", "missing"])
+
+        assert results[0]["chunk_count"] == 2
+        assert "first chunk" in results[0]["context"]
+        assert "second chunk" in results[0]["context"]
+        assert results[0]["sources"] == ["a.txt"]
+
+        assert results[1]["chunk_count"] == 1
+        assert results[1]["context"] == "only chunk"
+
+        assert results[2] == {"context": "", "sources": [], "chunk_count": 0}
+
+        # Single lookups go through the same query
+        result = await retriever.get_context_by_id("doc_b")
+        assert result["context"] == "only chunk"
+    finally:
+        await db.delete_vectors(parent_id="doc_a")
+        await db.delete_vectors(parent_id="doc_b")
@@ -1,12 +1,79 @@
+import asyncio
+
 from fastapi import FastAPI
 from transformers import pipeline
+import torch
 
 app = FastAPI()
 
-# Load the selected model for inference
-model = pipeline("text-generation", model="models/gpt2")
+# Load the selected model for inference, in half precision on GPU
+use_cuda = torch.cuda.is_available()
+model = pipeline(
+    "text-generation",
+    model="models/gpt2",
+    device=0 if use_cuda else -1,
+    torch_dtype=torch.float16 if use_cuda else None
+)
+# GPT-2 has no pad token; batched generation needs one
+if model.tokenizer.pad_token_id is None:
+    model.tokenizer.pad_token_id = model.model.config.eos_token_id
+# Pad on the left so every prompt in a batch ends where generation starts;
+# the pipeline passes the attention mask, so the padding itself is ignored
+model.tokenizer.padding_side = "left"
+
+# Prompts arriving within FLUSH_INTERVAL of each other share one forward pass
+BATCH_SIZE = 8
+FLUSH_INTERVAL = 0.01
+
+prompt_queue = None
+batch_worker = None
+
+def generate_batch(prompts):
+    # max_length counts the padded prompt, so only prompts of the same token
+    # length share a forward pass; each then gets as many new tokens as alone
+    groups = {}
+    for i, prompt in enumerate(prompts):
+        groups.setdefault(len(model.tokenizer(prompt)["input_ids"]), []).append(i)
+
+    texts = [None] * len(prompts)
+    for indices in groups.values():
+        outputs = model(
+            [prompts[i] for i in indices],
+            max_length=50,
+            num_return_sequences=1,
+            batch_size=len(indices)
+        )
+        for i, output in zip(indices, outputs):
+            texts[i] = output[0]['generated_text']
+    return texts
+
+async def drain_prompts():
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await prompt_queue.get()]
+        await asyncio.sleep(FLUSH_INTERVAL)
+        while len(batch) < BATCH_SIZE and not prompt_queue.empty():
+            batch.append(prompt_queue.get_nowait())
+
+        prompts = [prompt for prompt, _ in batch]
+        try:
+            texts = await loop.run_in_executor(None, generate_batch, prompts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            continue
+        for (_, future), text in zip(batch, texts):
+            if not future.done():
+                future.set_result(text)
 
 @app.post("/generate/")
 async def generate(prompt: str):
-    assistant_output = model(prompt, max_length=50, num_return_sequences=1)
-    return {"response": assistant_output[0]['generated_text']}
+    global prompt_queue, batch_worker
+    if batch_worker is None:
+        prompt_queue = asyncio.Queue()
+        batch_worker = asyncio.create_task(drain_prompts())
+
+    future = asyncio.get_running_loop().create_future()
+    await prompt_queue.put((prompt, future))
+    return {"response": await future}
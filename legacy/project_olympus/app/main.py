@@ -5,7 +5,9 @@ from app.services.model_service import download_model, get_quantized_models
 
 st.title("Project Olympus Chat Interface")
 
-# Function to list quantized models from Hugging Face
+# Function to list quantized models from Hugging Face; cached so reruns don't
+# query the Hub on every interaction
+@st.cache_data(ttl=3600)
 def list_quantized_models():
     models = get_quantized_models()
     return [model['id'] for model in models]
@@ -30,8 +32,20 @@ if st.sidebar.button("Download Model"):
     model_downloader.download(selected_model)
     st.sidebar.write(f"Model {selected_model} downloaded successfully.")
 
+# Load a model once per process, in half precision on GPU; Streamlit reruns
+# this script on every interaction, and all sessions share the cached pipeline
+@st.cache_resource
+def load_pipeline(model_id):
+    use_cuda = torch.cuda.is_available()
+    return pipeline(
+        "text-generation",
+        model=f"models/{model_id}",
+        device=0 if use_cuda else -1,
+        torch_dtype=torch.float16 if use_cuda else None
+    )
+
 # Load the selected model for inference
-model = pipeline("text-generation", model=f"models/{selected_model}")
+model = load_pipeline(selected_model)
 
 # Chat history
 if "history" not in st.session_state:
@@ -0,0 +1,24 @@
+import numpy as np
+from continual_learning.gaussian_model import GaussianModel
+
+def test_readding_class_replaces_its_samples():
+    rng = np.random.default_rng(0)
+    old_a = rng.normal(size=(6, 4))
+    new_a = rng.normal(loc=3.0, size=(5, 4))
+    b = rng.normal(size=(7, 4))
+
+    # Embeddings are passed in directly, so no transformer is needed
+    readded = GaussianModel(transformer=object())
+    readded.add_class("a", old_a)
+    readded.add_class("b", b)
+    readded.add_class("a", new_a)
+
+    fresh = GaussianModel(transformer=object())
+    fresh.add_class("b", b)
+    fresh.add_class("a", new_a)
+
+    assert readded._total_count == fresh._total_count
+    np.testing.assert_allclose(readded.shared_covariance, fresh.shared_covariance)
+    np.testing.assert_allclose(
+        readded.class_models["a"]["mean_vector"], new_a.mean(axis=0), rtol=1e-6
+    )